@@ -1,115 +1,1491 @@
-from flask import Flask, render_template, request, session
+from flask import Flask, render_template, request, session, jsonify, url_for, send_file, abort, g, Response
 from werkzeug.utils import secure_filename
+from werkzeug.datastructures import MultiDict
+from jinja2 import TemplateNotFound
 import os
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.preprocessing import PolynomialFeatures, StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import r2_score, mean_squared_error, accuracy_score, confusion_matrix
+from sklearn.linear_model import LinearRegression, LogisticRegression, SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split, KFold, StratifiedKFold
+from sklearn.metrics import accuracy_score, confusion_matrix
 import io
-import base64
+import csv
+import re
+import hashlib
+import itertools
+import json
+import math
+import pickle
+import shutil
+import socket
+import multiprocessing
+import threading
+import time
+import uuid
+import functools
+import sys
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+from statistics import NormalDist
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.figure import Figure
 import warnings
 warnings.filterwarnings('ignore')
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; spans then omit peak memory
+    resource = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'regression-analysis-secret-key-2024'
-app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'uploads')
+app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', os.path.join(os.path.dirname(__file__), 'uploads'))
+# Upper bound on memory held by parsed DataFrames shared across requests
+app.config['DATASET_CACHE_MAX_BYTES'] = int(os.environ.get('DATASET_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+# Per-column .npy sidecars written once per uploaded dataset
+app.config['COLUMNAR_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], '.columnar')
+# Files at least this large are fitted out-of-core instead of loaded into memory
+app.config['STREAMING_THRESHOLD_BYTES'] = int(os.environ.get('STREAMING_THRESHOLD_BYTES', 256 * 1024 * 1024))
+app.config['STREAM_CHUNK_ROWS'] = 100000
+# Rows kept from a streamed test split for plotting
+app.config['STREAM_PLOT_ROWS'] = 5000
+# Held-out rows used for early stopping of streamed logistic fits
+app.config['STREAM_EVAL_ROWS'] = 50000
+app.config['STREAM_MAX_EPOCHS'] = 20
+# Least-squares backend for linear/polynomial fits: 'numpy' (QR) or 'sklearn' (reference)
+app.config['SOLVER_BACKEND'] = os.environ.get('SOLVER_BACKEND', 'numpy')
+# Background analysis jobs: worker processes and max queued-or-running jobs per server
+# process, and the folder through which every server process shares job status and results
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_MAX_QUEUE'] = int(os.environ.get('JOB_MAX_QUEUE', 16))
+app.config['JOB_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], '.jobs')
+# Plot rendering threads, and the point count beyond which plots sample or bin
+app.config['RENDER_WORKERS'] = int(os.environ.get('RENDER_WORKERS', 2))
+app.config['PLOT_MAX_POINTS'] = 5000
+# Memoized analysis results: in-memory byte cap, plus an optional on-disk tier (None disables)
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['RESULT_CACHE_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], '.results')
+app.config['RESULT_CACHE_DISK_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))
+# Content-addressed plot images served from /plots; format is png, webp or svg
+app.config['PLOT_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], '.plots')
+app.config['PLOT_FORMAT'] = os.environ.get('PLOT_FORMAT', 'png')
+# Memory allowed for one polynomial expansion, what to do beyond it ('downgrade' or
+# 'reject'), the ridge penalty of the blockwise solver and its row-block size
+app.config['POLY_MEMORY_BUDGET_BYTES'] = int(os.environ.get('POLY_MEMORY_BUDGET_BYTES', 256 * 1024 * 1024))
+app.config['POLY_OVER_BUDGET'] = os.environ.get('POLY_OVER_BUDGET', 'downgrade')
+app.config['POLY_RIDGE_ALPHA'] = 1e-3
+app.config['POLY_BLOCK_BYTES'] = 16 * 1024 * 1024
+# Cross-validation: worker processes and scratch space for the shared memory-mapped arrays
+app.config['CV_WORKERS'] = int(os.environ.get('CV_WORKERS', os.cpu_count() or 1))
+app.config['CV_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], '.cv')
+# Targets with more classes than this use SAG, warm-started from a fit on a row sample
+app.config['LOGISTIC_WARM_START_CLASSES'] = 10
+app.config['LOGISTIC_WARM_START_ROWS'] = 5000
+# Most model specs accepted by one /api/analyze request
+app.config['BATCH_MAX_SPECS'] = int(os.environ.get('BATCH_MAX_SPECS', 100))
+# Fitted models saved for /predict, how many stay loaded in memory, and the disk quota
+# beyond which the least recently used ones are deleted
+app.config['MODEL_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], '.models')
+app.config['MODEL_CACHE_ENTRIES'] = int(os.environ.get('MODEL_CACHE_ENTRIES', 64))
+app.config['MODEL_MAX_BYTES'] = int(os.environ.get('MODEL_MAX_BYTES', 256 * 1024 * 1024))
+# Upload preview: rows read from the top, and blocks sampled across a CSV to check dtypes
+app.config['PREVIEW_ROWS'] = 1000
+app.config['PREVIEW_SAMPLE_BLOCKS'] = 8
+app.config['PREVIEW_SAMPLE_BYTES'] = 64 * 1024
+# Threads parsing uploads in the background after the preview is shown
+app.config['PRELOAD_WORKERS'] = int(os.environ.get('PRELOAD_WORKERS', 1))
+# Fast mode: bootstrap refits behind the coefficient margins, and held-out
+# prediction resamples behind the metric confidence intervals
+app.config['SAMPLE_BOOTSTRAP_ROUNDS'] = int(os.environ.get('SAMPLE_BOOTSTRAP_ROUNDS', 20))
+app.config['SAMPLE_METRIC_RESAMPLES'] = 500
+
+# Uploads are stored once per distinct content; past the TTL or over the quota
+# the least recently used ones are evicted with everything derived from them
+app.config['UPLOAD_MAX_BYTES'] = int(os.environ.get('UPLOAD_MAX_BYTES', 4 * 1024 * 1024 * 1024))
+app.config['UPLOAD_TTL_SECONDS'] = int(os.environ.get('UPLOAD_TTL_SECONDS', 7 * 24 * 3600))
+
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+class Histogram:
+    """Prometheus-style histogram with one series per value of a single label
+
+    Held per process: each server or job worker process reports its own.
+    """
+    
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    
+    def __init__(self, name, help_text, label):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        # label value -> [cumulative bucket counts, count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.setdefault(label_value, [[0] * len(self.BUCKETS), 0, 0.0])
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+    
+    def render(self):
+        """Lines of the Prometheus text exposition format"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = sorted((key, list(buckets), count, total) for key, (buckets, count, total)
+                              in self._series.items())
+        for key, buckets, count, total in snapshot:
+            label = f'{self.label}="{key}"'
+            for bound, bucket_count in zip(self.BUCKETS, buckets):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label}}} {total}')
+            lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+    
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+stage_seconds = Histogram('regression_stage_seconds', 'Time spent in each pipeline stage', 'stage')
+request_seconds = Histogram('regression_request_seconds', 'Request latency by endpoint', 'endpoint')
+
+# Spans of the request being handled on this thread (None outside requests)
+_request_spans = threading.local()
+
+def peak_rss_bytes():
+    """The process's peak resident set size so far, or None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+@contextmanager
+def span(stage, **attrs):
+    """Time a pipeline stage and yield its record, to which callers may add rows/cols
+
+    The duration goes into the stage histogram. Inside a request, the record
+    is also kept for the Server-Timing header and logged. Peak memory is the
+    process high-water mark at the end of the span. rss_growth_bytes is how
+    far the span raised that mark.
+    """
+    record = {'stage': stage, **attrs}
+    peak_before = peak_rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        peak_after = peak_rss_bytes()
+        if peak_after is not None:
+            record['peak_rss_bytes'] = peak_after
+            record['rss_growth_bytes'] = peak_after - peak_before
+        stage_seconds.observe(stage, record['seconds'])
+        spans = getattr(_request_spans, 'spans', None)
+        if spans is not None:
+            spans.append(record)
+            app.logger.debug('span %s', json.dumps(record, default=str))
+
+def array_shape(values):
+    """(rows, cols) of the first two-dimensional array or frame among values, or None"""
+    for value in values:
+        shape = getattr(value, 'shape', None)
+        if shape is not None and len(shape) == 2:
+            return int(shape[0]), int(shape[1])
+    return None
+
+def timed(stage):
+    """Decorator running a function inside span(stage), with rows/cols of its array arguments or result"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, function=func.__name__) as record:
+                result = func(*args, **kwargs)
+                shape = array_shape(args) or array_shape(result if isinstance(result, tuple) else (result,))
+                if shape is not None:
+                    record['rows'], record['cols'] = shape
+                return result
+        return wrapper
+    return decorate
+
+# (path, size, mtime) -> content hash, so unchanged files are hashed only once
+_digest_memo = {}
+_digest_lock = threading.Lock()
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's contents"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digest_memo:
+            return _digest_memo[memo_key]
+    
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(chunk_size), b''):
+            sha.update(block)
+    digest = sha.hexdigest()
+    
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+def remember_digest(path, digest):
+    """Seed the digest memo for a file whose content hash is already known"""
+    stat = os.stat(path)
+    with _digest_lock:
+        _digest_memo[(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)] = digest
+
+def read_dataset(path):
+    """Parse a CSV or Excel file into a DataFrame"""
+    if path.endswith('.csv'):
+        return pd.read_csv(path)
+    elif path.endswith(('.xls', '.xlsx')):
+        return pd.read_excel(path)
+    raise ValueError('Unsupported file format')
+
+def list_excel_sheets(path):
+    """Sheet names of a workbook, without reading any sheet's cells"""
+    if path.endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+    return pd.ExcelFile(path).sheet_names
+
+def convert_excel_sheet(path, sheet, csv_path):
+    """Write one sheet of a workbook to csv_path, row by row for .xlsx
+
+    Matches pd.read_excel: the first row is the header, trailing empty
+    cells and rows are dropped, and empty rows in between are kept.
+    """
+    tmp_path = f'{csv_path}.{uuid.uuid4().hex}.tmp'
+    if not path.endswith('.xlsx'):
+        # Legacy .xls has no streaming reader; it is still parsed only this once
+        pd.read_excel(path, sheet_name=sheet).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, csv_path)
+        return
+    
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        while header and header[-1] is None:
+            header.pop()
+        if not header:
+            raise ValueError(f'Sheet {sheet!r} is empty')
+        width = len(header)
+        
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(['' if name is None else name for name in header])
+            pending_blank = 0
+            for row in rows:
+                row = row[:width]
+                if all(value is None for value in row):
+                    pending_blank += 1
+                    continue
+                writer.writerows([[''] * width] * pending_blank)
+                pending_blank = 0
+                writer.writerow(['' if value is None else value for value in row] + [''] * (width - len(row)))
+    finally:
+        workbook.close()
+    os.replace(tmp_path, csv_path)
+
+def sample_csv_rows(path, columns):
+    """Rows parsed from blocks of lines at evenly spaced offsets through a CSV
+
+    Lines cut by a block boundary are dropped and malformed ones skipped, so
+    this is only fit for checking dtypes, never for analysis.
+    """
+    n_blocks = app.config['PREVIEW_SAMPLE_BLOCKS']
+    block_bytes = app.config['PREVIEW_SAMPLE_BYTES']
+    size = os.path.getsize(path)
+    lines = []
+    with open(path, 'rb') as fh:
+        for k in range(1, n_blocks + 1):
+            fh.seek(size * k // (n_blocks + 1))
+            lines.extend(fh.read(block_bytes).split(b'\n')[1:-1])
+    if not lines:
+        return None
+    try:
+        return pd.read_csv(io.BytesIO(b'\n'.join(lines)), names=list(columns), header=None,
+                           on_bad_lines='skip')
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def preview_dataset(path):
+    """(first PREVIEW_ROWS rows, numeric column names) from bounded reads of a file
+
+    A column counts as numeric only if it is numeric both in the first rows
+    and in rows sampled across the rest of a CSV, so the cost does not grow
+    with file size. The background full parse confirms the types.
+    """
+    n_rows = app.config['PREVIEW_ROWS']
+    if path.endswith('.csv'):
+        head = pd.read_csv(path, nrows=n_rows)
+    elif path.endswith(('.xls', '.xlsx')):
+        head = pd.read_excel(path, nrows=n_rows)
+    else:
+        raise ValueError('Unsupported file format')
+    
+    combined = head
+    if path.endswith('.csv') and len(head) == n_rows:
+        sample = sample_csv_rows(path, head.columns)
+        if sample is not None and len(sample):
+            combined = pd.concat([head, sample], ignore_index=True)
+    numeric_columns = [col for col in head.columns if pd.api.types.is_numeric_dtype(combined[col])]
+    return head, numeric_columns
+
+def compact_frame(df, category_ratio=0.5):
+    """Shrink a parsed frame's dtypes without changing any value
+
+    Integers take the smallest type that holds them, floats become float32
+    when every value round-trips exactly, and string columns with at most
+    category_ratio distinct values per row become categoricals. Returns the
+    compacted frame and a per-column memory report.
+    """
+    compacted = {}
+    report = []
+    for col in df.columns:
+        series = df[col]
+        original_bytes = int(series.memory_usage(index=False, deep=True))
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+            series = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+            narrow = series.astype(np.float32)
+            if np.array_equal(narrow.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+                series = narrow
+        elif series.dtype == object and len(series):
+            values = series.dropna()
+            if values.map(type).eq(str).all() and values.nunique() <= category_ratio * len(series):
+                series = series.astype('category')
+        compacted[col] = series
+        report.append({'column': str(col), 'original_dtype': str(df[col].dtype), 'dtype': str(series.dtype),
+                       'original_bytes': original_bytes,
+                       'bytes': int(series.memory_usage(index=False, deep=True))})
+    return pd.DataFrame(compacted, index=df.index), report
+
+def widen(series):
+    """Undo compact_frame for one column: 64-bit numbers, plain objects for categoricals"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(object)
+    if pd.api.types.is_extension_array_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype(np.int64)
+    if pd.api.types.is_float_dtype(series):
+        return series.astype(np.float64)
+    return series
+
+def finite_or_none(value):
+    """A float for JSON, with NaN and infinities as None"""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+def profile_frame(df, block_rows=65536):
+    """Per-column statistics and the numeric correlation matrix of a parsed frame
+
+    Statistics are taken on the widened columns, so each mean is exactly the
+    one prepare_data imputes with. The correlation matrix is that of the
+    mean-imputed numeric columns (the values the models are fitted on), from
+    one centered X'X product accumulated over row blocks. Returns (profile,
+    correlation), correlation ordered like profile['correlation_columns'].
+    """
+    columns, numeric, means = [], [], []
+    for col in df.columns:
+        series = df[col]
+        entry = {'name': str(col), 'dtype': str(series.dtype), 'nulls': int(series.isna().sum()),
+                 'mean': None, 'std': None, 'min': None, 'max': None}
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+            wide = widen(series)
+            mean = wide.mean()
+            entry.update(mean=finite_or_none(mean), std=finite_or_none(wide.std()),
+                         min=finite_or_none(wide.min()), max=finite_or_none(wide.max()))
+            numeric.append(col)
+            means.append(mean)
+        columns.append(entry)
+    
+    mean_vec = np.array(means, dtype=np.float64)
+    gram = np.zeros((len(numeric), len(numeric)))
+    for start in range(0, len(df), block_rows):
+        centered = df.iloc[start:start + block_rows][numeric].to_numpy(dtype=np.float64) - mean_vec
+        centered[np.isnan(centered)] = 0.0
+        gram += centered.T @ centered
+    scale = np.sqrt(np.diag(gram))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Constant or empty columns have no correlation and are left as NaN
+        correlation = gram / np.outer(scale, scale)
+    
+    profile = {'rows': int(len(df)), 'columns': columns, 'correlation_columns': [str(col) for col in numeric]}
+    return profile, correlation
+
+def attach_profile_means(df, profile):
+    """Record a profile's column means on a frame holding every row of the profiled dataset"""
+    if profile is not None:
+        df.attrs['profile_rows'] = profile['rows']
+        df.attrs['profile_means'] = {entry['name']: entry['mean'] for entry in profile['columns']
+                                     if entry['mean'] is not None}
+    return df
+
+def profile_means(df):
+    """Upload-time column means for df, or {} unless df is a full frame of a profiled dataset"""
+    # attrs follow projections and row subsets alike; only the full row count qualifies
+    if df.attrs.get('profile_rows') != len(df):
+        return {}
+    return df.attrs.get('profile_means', {})
+
+def unique_columns(columns):
+    """Drop repeated column names while keeping their order"""
+    return list(dict.fromkeys(columns))
+
+def columnar_dir(digest):
+    """Directory holding the columnar sidecar for a dataset digest"""
+    return os.path.join(app.config['COLUMNAR_FOLDER'], digest)
+
+def write_columnar_sidecar(digest, df, memory_report=None, profile=None, correlation=None):
+    """Store each numeric column as its own memory-mappable .npy file
+
+    The manifest also keeps compact_frame's memory report and the column
+    profile for the upload page; the correlation matrix is stored alongside.
+    """
+    target_dir = columnar_dir(digest)
+    manifest_path = os.path.join(target_dir, 'manifest.json')
+    if os.path.exists(manifest_path):
+        return
+    os.makedirs(target_dir, exist_ok=True)
+    
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {'name': str(col), 'file': None, 'dtype': str(series.dtype)}
+        # Non-numeric columns are never regressed on, so only numeric ones get a sidecar
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+            entry['file'] = f'{i}.npy'
+            np.save(os.path.join(target_dir, entry['file']), np.ascontiguousarray(series.to_numpy()))
+        columns.append(entry)
+    if correlation is not None:
+        np.save(os.path.join(target_dir, 'correlation.npy'), correlation)
+    
+    # The manifest is written last (atomically) so its presence marks a complete sidecar
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as fh:
+        json.dump({'rows': int(len(df)), 'columns': columns, 'memory': memory_report, 'profile': profile}, fh)
+    os.replace(tmp_path, manifest_path)
+
+def read_sidecar_manifest(digest):
+    """The manifest of a dataset's columnar sidecar, or None if it has none yet"""
+    try:
+        with open(os.path.join(columnar_dir(digest), 'manifest.json')) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+def read_memory_report(digest):
+    """compact_frame's per-column report for a parsed dataset, or None"""
+    manifest = read_sidecar_manifest(digest)
+    return manifest.get('memory') if manifest else None
+
+def read_profile(digest):
+    """profile_frame's column profile for a parsed dataset, or None"""
+    manifest = read_sidecar_manifest(digest)
+    return manifest.get('profile') if manifest else None
+
+def read_correlations(digest):
+    """(numeric column names, memory-mapped correlation matrix) of a parsed dataset, or None"""
+    profile = read_profile(digest)
+    if profile is None:
+        return None
+    try:
+        matrix = np.load(os.path.join(columnar_dir(digest), 'correlation.npy'), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    return profile['correlation_columns'], matrix
+
+def read_columnar_sidecar(digest, columns):
+    """Load only the requested columns from a sidecar, or None if they are not all stored"""
+    target_dir = columnar_dir(digest)
+    manifest = read_sidecar_manifest(digest)
+    if manifest is None:
+        return None
+    
+    files = {entry['name']: entry['file'] for entry in manifest['columns']}
+    if any(files.get(col) is None for col in columns):
+        return None
+    data = {col: np.load(os.path.join(target_dir, files[col]), mmap_mode='r') for col in columns}
+    return pd.DataFrame(data, columns=columns)
+
+def iter_dataset_chunks(path, columns, chunk_rows):
+    """Yield DataFrames of at most chunk_rows rows holding only the requested columns"""
+    columns = unique_columns(columns)
+    sidecar = read_columnar_sidecar(file_digest(path), columns)
+    if sidecar is not None:
+        # Slicing the memory-mapped frame only touches the pages of each chunk
+        for start in range(0, len(sidecar), chunk_rows):
+            yield sidecar.iloc[start:start + chunk_rows]
+    elif path.endswith('.csv'):
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunk_rows):
+            yield chunk[columns]
+    else:
+        raise ValueError('Streaming mode requires a CSV file')
+
+def iter_stream_splits(path, columns, chunk_rows, test_size=0.2, random_state=42):
+    """Yield (chunk, is_test) with a train/test assignment that is identical on every pass"""
+    for i, chunk in enumerate(iter_dataset_chunks(path, columns, chunk_rows)):
+        rng = np.random.default_rng([random_state, i])
+        yield chunk, rng.random(len(chunk)) < test_size
+
+def reservoir_update(sample_rows, sample_keys, rows, keys, limit):
+    """Merge rows into a bounded uniform sample by keeping the smallest random keys"""
+    sample_rows = np.concatenate([sample_rows, rows])
+    sample_keys = np.concatenate([sample_keys, keys])
+    if len(sample_keys) > limit:
+        keep = np.argpartition(sample_keys, limit)[:limit]
+        sample_rows, sample_keys = sample_rows[keep], sample_keys[keep]
+    return sample_rows, sample_keys
+
+def sample_dataset(path, columns, n_rows, stratify=None, random_state=42, chunk_rows=None):
+    """Draw a random sample of n_rows rows in one pass; returns (sample, total_rows)
+
+    Every row gets a random key and the n_rows smallest keys are kept, so
+    memory stays bounded by the sample plus one chunk. With stratify (a
+    column name) the smallest keys are kept per class, and each class is
+    then cut to its share of the file for a proportionally stratified sample.
+    """
+    chunk_rows = chunk_rows or app.config['STREAM_CHUNK_ROWS']
+    rng = np.random.default_rng(random_state)
+    sample = keys = None
+    class_counts = pd.Series(dtype=np.float64)
+    total_rows = 0
+    for chunk in iter_dataset_chunks(path, columns, chunk_rows):
+        chunk = chunk.set_axis(pd.RangeIndex(total_rows, total_rows + len(chunk)))
+        total_rows += len(chunk)
+        chunk_keys = pd.Series(rng.random(len(chunk)), index=chunk.index)
+        sample = chunk if sample is None else pd.concat([sample, chunk])
+        keys = chunk_keys if keys is None else pd.concat([keys, chunk_keys])
+        if stratify is None:
+            rank = keys.rank(method='first')
+        else:
+            class_counts = class_counts.add(chunk[stratify].value_counts(dropna=False), fill_value=0)
+            rank = keys.groupby(sample[stratify], dropna=False).rank(method='first')
+        keep = (rank <= n_rows).to_numpy()
+        sample, keys = sample[keep], keys[keep]
+    if not total_rows:
+        raise ValueError('The dataset has no rows to sample')
+    
+    if stratify is not None and total_rows > n_rows:
+        share = (class_counts * n_rows / total_rows).to_numpy()
+        quota = np.floor(share)
+        # Rows lost to rounding down go to the classes with the largest remainders
+        quota[np.argsort(quota - share, kind='stable')[:int(n_rows - quota.sum())]] += 1
+        codes = pd.Index(class_counts.index).get_indexer(sample[stratify])
+        rank = keys.groupby(codes).rank(method='first').to_numpy()
+        sample = sample[rank <= quota[codes]]
+    return sample.sort_index(), total_rows
+
+def is_large_dataset(path):
+    """Whether a file is big enough to be processed out-of-core"""
+    return os.path.getsize(path) >= app.config['STREAMING_THRESHOLD_BYTES']
+
+class DatasetCache:
+    """Process-level LRU cache of parsed DataFrames keyed by file content hash
+
+    Full frames are stored under (digest, None) and column projections read
+    from a columnar sidecar under (digest, columns).
+    """
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per digest so concurrent requests for the same file parse it once
+        self._load_locks = {}
+    
+    def get(self, key):
+        """Return the cached DataFrame for a key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def put(self, key, df):
+        """Store a DataFrame, evicting least recently used entries over the cap"""
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            # Too large to ever fit; callers still get the frame, it just isn't retained
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (df, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+    
+    def discard(self, digest):
+        """Drop every cached frame derived from a digest"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == digest]:
+                self.current_bytes -= self._entries.pop(key)[1]
+    
+    def load(self, path):
+        """Return (digest, DataFrame) for a file, parsing it only on a cache miss"""
+        digest = file_digest(path)
+        return digest, self._load_once((digest, None), lambda: self._parse(digest, path))
+    
+    def load_columns(self, path, columns):
+        """Return (digest, DataFrame) holding only the requested columns
+
+        Reads from the columnar sidecar when one exists, so wide files never
+        pay for the columns that were not selected.
+        """
+        digest = file_digest(path)
+        columns = unique_columns(columns)
+        full = self.get((digest, None))
+        if full is not None:
+            return digest, full[columns]
+        
+        def read_projection():
+            df = read_columnar_sidecar(digest, columns)
+            if df is None:
+                # No usable sidecar yet: parse once (which also writes it) and project
+                return self.load(path)[1][columns]
+            return attach_profile_means(df, read_profile(digest))
+        
+        return digest, self._load_once((digest, tuple(columns)), read_projection)
+    
+    def load_sample(self, path, columns, n_rows, stratify=None, random_state=42):
+        """Return (digest, sample) for a random row sample, drawn once per file and options
+
+        The file's total row count is kept in sample.attrs['total_rows'].
+        """
+        digest = file_digest(path)
+        columns = unique_columns(columns)
+        
+        def draw():
+            sample, total_rows = sample_dataset(path, columns, n_rows, stratify, random_state)
+            sample.attrs['total_rows'] = total_rows
+            return sample
+        
+        return digest, self._load_once((digest, tuple(columns), n_rows, stratify, random_state), draw)
+    
+    def _parse(self, digest, path):
+        with span('parse') as record:
+            df, memory_report = compact_frame(read_dataset(path))
+            record['rows'], record['cols'] = df.shape
+        with span('profile'):
+            profile, correlation = profile_frame(df)
+        with span('write_sidecar'):
+            write_columnar_sidecar(digest, df, memory_report, profile, correlation)
+        return attach_profile_means(df, profile)
+    
+    def _load_once(self, key, loader):
+        df = self.get(key)
+        if df is not None:
+            return df
+        
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            # Another request may have finished loading while we waited
+            df = self.get(key)
+            if df is None:
+                df = loader()
+                self.put(key, df)
+        with self._lock:
+            self._load_locks.pop(key, None)
+        return df
+
+class DatasetPreloader:
+    """Parses uploads in the background and confirms the column types the preview guessed"""
+    
+    def __init__(self, cache, max_workers, keep=256):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.keep = keep
+        self._status = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(self, path, digest, numeric_columns):
+        """Start the full parse of an upload whose preview found numeric_columns"""
+        self._set(digest, {'state': 'parsing', 'numeric_columns': numeric_columns, 'changed': False})
+        thread_pool('preload', self.max_workers).submit(self._parse, path, digest, numeric_columns)
+    
+    def _parse(self, path, digest, numeric_columns):
+        try:
+            df = self.cache.load(path)[1]
+        except Exception as e:
+            self._set(digest, {'state': 'failed', 'numeric_columns': numeric_columns, 'changed': False,
+                               'error': str(e)})
+            return
+        confirmed = df.select_dtypes(include=[np.number]).columns.tolist()
+        profile = read_profile(digest)
+        self._set(digest, {'state': 'ready', 'numeric_columns': confirmed,
+                           'changed': confirmed != numeric_columns, 'memory': read_memory_report(digest),
+                           'profile': profile['columns'] if profile else None})
+    
+    def _set(self, digest, status):
+        with self._lock:
+            self._status[digest] = status
+            self._status.move_to_end(digest)
+            while len(self._status) > self.keep:
+                self._status.popitem(last=False)
+    
+    def status(self, digest):
+        with self._lock:
+            status = self._status.get(digest)
+            return dict(status) if status is not None else None
+    
+    def forget(self, digest):
+        with self._lock:
+            self._status.pop(digest, None)
+
+class PreparedDataset:
+    """A loaded frame whose imputed columns and train/test splits are computed once
+
+    Passed to RegressionAnalyzer in place of a DataFrame when several analyses
+    share one dataset, so prepare_data and split_data reuse each other's work.
+    """
+    
+    def __init__(self, df):
+        self.df = df
+        self._columns = {}
+        self._fills = {}
+        self._splits = {}
+    
+    def column(self, name, fill='mean'):
+        """One column with missing values filled as prepare_data would, read-only"""
+        key = (name, fill)
+        if key not in self._columns:
+            col = widen(self.df[name])
+            if fill == 'mean':
+                value = profile_means(self.df).get(name)
+                value = col.mean() if value is None else value
+            else:
+                value = col.mode()[0]
+            values = col.fillna(value).to_numpy()
+            values.flags.writeable = False
+            self._columns[key] = values
+            self._fills[key] = value
+        return self._columns[key]
+    
+    def arrays(self, target_col, feature_cols, with_fill=False):
+        """(X, y) matching RegressionAnalyzer.prepare_data on the full frame"""
+        missing_cols = [col for col in [target_col] + feature_cols if col not in self.df.columns]
+        if missing_cols:
+            raise ValueError(f"Columns not found in data: {missing_cols}")
+        X = np.column_stack([self.column(col) for col in feature_cols])
+        y = self.column(target_col, 'mean' if pd.api.types.is_numeric_dtype(self.df[target_col]) else 'mode')
+        if with_fill:
+            return X, y, np.array([self._fills[(col, 'mean')] for col in feature_cols], dtype=np.float64)
+        return X, y
+    
+    def split_indices(self, n_rows, random_state, stratify=None):
+        """Train/test row indices, identical to train_test_split's for the same inputs"""
+        # Stratification labels are this dataset's own cached target columns
+        key = (n_rows, random_state, None if stratify is None else id(stratify))
+        cached = self._splits.get(key)
+        if cached is None or cached[0] is not stratify:
+            train, test = train_test_split(np.arange(n_rows), test_size=0.2, random_state=random_state,
+                                           stratify=stratify)
+            cached = self._splits[key] = (stratify, train, test)
+        return cached[1], cached[2]
+
+def regression_metrics(y_true, y_pred):
+    """Return (r2, mse, rmse) computed directly from the residuals"""
+    residuals = y_true - y_pred
+    ss_res = float(residuals @ residuals)
+    centered = y_true - y_true.mean()
+    ss_tot = float(centered @ centered)
+    if ss_tot > 0:
+        r2 = 1 - ss_res / ss_tot
+    else:
+        # Same convention as sklearn's r2_score for a constant target
+        r2 = 1.0 if ss_res == 0 else 0.0
+    mse = ss_res / len(y_true)
+    return r2, mse, np.sqrt(mse)
+
+def stepwise_path(cov, n_train, test_moments, direction='forward', tol=1e-10):
+    """Forward or backward stepwise OLS path from second moments alone
+
+    cov is the training covariance of [features, target] over n_train rows and
+    test_moments the test rows' (n, cross products, sums) about the training
+    means. Candidates are scored
+    from a Cholesky factor grown one row per added feature (forward), or from
+    the inverse Gram matrix shrunk by a rank-one update per removed feature
+    (backward), so no step refits from the data. Returns one dict per step
+    with the selected column indices and standardized coefficients.
+    """
+    scale = np.sqrt(np.clip(np.diag(cov)[:-1], 0.0, None))
+    # Constant columns can never enter the model
+    usable = [j for j in range(len(scale)) if scale[j] > 0]
+    scale[scale == 0] = 1.0
+    # Correlation-scaled Gram matrix and cross products of the training rows
+    gram = n_train * cov[:-1, :-1] / np.outer(scale, scale)
+    xty = n_train * cov[:-1, -1] / scale
+    yty = n_train * cov[-1, -1]
+    n_test, test_gram, test_sums = test_moments
+    sst_test = test_gram[-1, -1] - test_sums[-1] ** 2 / n_test
+    
+    def step(action, feature, selected, beta, rss):
+        # Test residual is v'a about the training means, with v = (-beta / scale, 1)
+        raw = beta / scale[selected]
+        sse = (test_gram[-1, -1] - 2 * raw @ test_gram[selected, -1]
+               + raw @ test_gram[np.ix_(selected, selected)] @ raw)
+        sse = max(float(sse), 0.0)
+        rss = max(float(rss), 0.0)
+        return {
+            'action': action,
+            'feature': feature,
+            'selected': list(selected),
+            'beta': beta,
+            'train_r2': 1 - rss / yty if yty > 0 else 0.0,
+            # Gaussian AIC up to a constant; the intercept counts as a parameter
+            'aic': n_train * np.log(max(rss, np.finfo(np.float64).tiny) / n_train) + 2 * (len(selected) + 1),
+            'test_mse': sse / n_test,
+            'test_r2': 1 - sse / sst_test if sst_test > 0 else 0.0
+        }
+    
+    def grow(chol, z, selected, j):
+        """Append column j to the Cholesky factor; None if j is collinear with selected"""
+        w = np.linalg.solve(chol, gram[selected, j]) if selected else np.empty(0)
+        d2 = gram[j, j] - w @ w
+        if d2 <= tol * gram[j, j]:
+            return None
+        d = np.sqrt(d2)
+        k = len(selected)
+        grown = np.zeros((k + 1, k + 1))
+        grown[:k, :k] = chol
+        grown[k, :k] = w
+        grown[k, k] = d
+        return grown, np.append(z, (xty[j] - w @ z) / d)
+    
+    path = []
+    if direction == 'forward':
+        chol, z, selected = np.empty((0, 0)), np.empty(0), []
+        candidates = list(usable)
+        while candidates:
+            # Score every candidate with one triangular solve: RSS drops by num² / d²
+            cols = np.array(candidates)
+            if selected:
+                W = np.linalg.solve(chol, gram[np.ix_(selected, cols)])
+                d2 = np.diag(gram)[cols] - np.einsum('ij,ij->j', W, W)
+                num = xty[cols] - W.T @ z
+            else:
+                d2, num = np.diag(gram)[cols].copy(), xty[cols]
+            # A candidate collinear with the selection stays collinear with any superset
+            keep = d2 > tol * np.diag(gram)[cols]
+            candidates = cols[keep].tolist()
+            if not candidates:
+                break
+            j = candidates[int(np.argmax(num[keep] ** 2 / d2[keep]))]
+            chol, z = grow(chol, z, selected, j)
+            selected.append(j)
+            candidates.remove(j)
+            beta = np.linalg.solve(chol.T, z)
+            path.append(step('add', j, selected, beta, yty - z @ z))
+        return path
+    
+    if direction != 'backward':
+        raise ValueError(f'Unknown stepwise direction: {direction}')
+    
+    # Start from every usable column that is not collinear with the ones before it
+    chol, z, selected = np.empty((0, 0)), np.empty(0), []
+    for j in usable:
+        grown = grow(chol, z, selected, j)
+        if grown is not None:
+            chol, z = grown
+            selected.append(j)
+    if not selected:
+        return path
+    chol_inv = np.linalg.solve(chol, np.eye(len(selected)))
+    inv = chol_inv.T @ chol_inv
+    beta = inv @ xty[selected]
+    rss = yty - xty[selected] @ beta
+    path.append(step('start', None, selected, beta, rss))
+    while len(selected) > 1:
+        # Dropping column i raises the RSS by beta_i² / inv_ii
+        increase = beta ** 2 / np.diag(inv)
+        i = int(np.argmin(increase))
+        rss += increase[i]
+        keep = np.arange(len(selected)) != i
+        g = inv[keep, i]
+        beta = beta[keep] - g * beta[i] / inv[i, i]
+        inv = inv[np.ix_(keep, keep)] - np.outer(g, g) / inv[i, i]
+        removed = selected.pop(i)
+        path.append(step('remove', removed, selected, beta, rss))
+    return path
+
+def count_polynomial_terms(n_features, degree, interaction_only=False):
+    """Number of non-constant polynomial terms, computed without enumerating them"""
+    if interaction_only:
+        return sum(math.comb(n_features, k) for k in range(1, min(degree, n_features) + 1))
+    return math.comb(n_features + degree, degree) - 1
+
+def polynomial_terms(n_features, degree, interaction_only=False, max_terms=None):
+    """Feature-index tuples for each term, lowest degree first, optionally capped"""
+    combine = itertools.combinations if interaction_only else itertools.combinations_with_replacement
+    terms = itertools.chain.from_iterable(combine(range(n_features), k) for k in range(1, degree + 1))
+    return list(itertools.islice(terms, max_terms))
+
+def expand_polynomial(X, terms):
+    """Materialize the polynomial terms of X as a dense float64 matrix"""
+    out = np.empty((X.shape[0], len(terms)))
+    for j, term in enumerate(terms):
+        col = out[:, j]
+        col[:] = X[:, term[0]]
+        for idx in term[1:]:
+            col *= X[:, idx]
+    return out
+
+def plan_polynomial_expansion(n_rows, n_features, degree, interaction_only=False, max_terms=None,
+                              budget=None, policy=None):
+    """Decide how to expand before allocating anything
+
+    Returns a plan dict whose mode is 'dense' (full expanded matrix) when
+    that fits the memory budget, else 'blockwise' (only the Gram matrix and
+    one row block are ever held). If even that does not fit, the request is
+    downgraded to interaction-only terms and then to a term cap, or rejected
+    with ValueError, depending on policy.
+    """
+    budget = budget or app.config['POLY_MEMORY_BUDGET_BYTES']
+    policy = policy or app.config['POLY_OVER_BUDGET']
+    notes = []
+    
+    def n_terms_for(interaction_only, max_terms):
+        n_terms = count_polynomial_terms(n_features, degree, interaction_only)
+        return min(n_terms, max_terms) if max_terms else n_terms
+    
+    def blockwise_bytes(n_terms):
+        # Gram matrix plus solver copies, and at least one expanded row
+        return 4 * n_terms * n_terms * 8 + n_terms * 8
+    
+    n_terms = n_terms_for(interaction_only, max_terms)
+    # Expanded train/test matrices plus the standardized working copy
+    dense_bytes = 2 * n_rows * n_terms * 8
+    if dense_bytes + blockwise_bytes(n_terms) > budget and blockwise_bytes(n_terms) > budget:
+        if policy == 'reject':
+            raise ValueError(f'Degree {degree} expansion of {n_features} features needs {n_terms:,} terms '
+                             f'(~{blockwise_bytes(n_terms) / 2 ** 20:,.0f} MB even blockwise), '
+                             f'over the {budget / 2 ** 20:,.0f} MB budget')
+        if not interaction_only:
+            interaction_only = True
+            n_terms = n_terms_for(interaction_only, max_terms)
+            notes.append('Switched to interaction-only terms to stay within the memory budget')
+        if blockwise_bytes(n_terms) > budget:
+            max_terms = max(1, int(math.sqrt(budget / 32)) - 1)
+            n_terms = n_terms_for(interaction_only, max_terms)
+            notes.append(f'Capped the expansion at {n_terms:,} lowest-degree terms to stay within the memory budget')
+        dense_bytes = 2 * n_rows * n_terms * 8
+    
+    return {
+        'mode': 'dense' if dense_bytes + blockwise_bytes(n_terms) <= budget else 'blockwise',
+        'degree': degree,
+        'interaction_only': interaction_only,
+        'max_terms': max_terms,
+        'n_terms': n_terms,
+        'dense_bytes': dense_bytes,
+        'blockwise_bytes': blockwise_bytes(n_terms),
+        'notes': notes
+    }
+
+def fold_standardization(X_train, coef, intercept):
+    """Raw-unit (weights, bias) for coefficients fitted on standardized X_train columns"""
+    mean = X_train.mean(axis=0)
+    scale = X_train.std(axis=0)
+    scale[scale == 0] = 1.0
+    weights = np.asarray(coef, dtype=np.float64) / scale
+    return weights, float(intercept - mean @ weights)
+
+class FittedModel:
+    """A fitted model reduced to a linear map of (optionally polynomial) features
+
+    Scaling is folded into the weights, so scoring is: fill missing values,
+    expand the polynomial terms, one matrix product, then the link function
+    ('identity', 'logistic' for binary, 'softmax' or one-vs-rest 'ovr').
+    """
+    
+    def __init__(self, feature_names, fill, weights, bias, terms=None, classes=None, link='identity'):
+        self.feature_names = list(feature_names)
+        self.fill = np.asarray(fill, dtype=np.float64)
+        self.weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        self.bias = np.atleast_1d(np.asarray(bias, dtype=np.float64))
+        self.terms = [tuple(int(i) for i in term) for term in terms] if terms is not None else None
+        self.classes = np.asarray(list(classes)) if classes is not None else None
+        if self.classes is not None and self.classes.dtype == object:
+            self.classes = self.classes.astype(str)
+        self.link = link
+    
+    def _arrays(self):
+        arrays = {'feature_names': np.asarray(self.feature_names, dtype=str), 'fill': self.fill,
+                  'weights': self.weights, 'bias': self.bias, 'link': np.asarray(self.link)}
+        if self.terms is not None:
+            # Ragged term tuples as one padded index matrix
+            padded = np.full((len(self.terms), max(map(len, self.terms))), -1, dtype=np.int32)
+            for j, term in enumerate(self.terms):
+                padded[j, :len(term)] = term
+            arrays['terms'] = padded
+        if self.classes is not None:
+            arrays['classes'] = self.classes
+        return arrays
+    
+    def digest(self):
+        """SHA-256 of the model's arrays, stable across saves"""
+        digest = hashlib.sha256()
+        for name, value in sorted(self._arrays().items()):
+            digest.update(f'{name}:{value.dtype.str}:{value.shape}'.encode('utf-8'))
+            digest.update(np.ascontiguousarray(value).tobytes())
+        return digest.hexdigest()
+    
+    def to_bytes(self):
+        buf = io.BytesIO()
+        np.savez(buf, **self._arrays())
+        return buf.getvalue()
+    
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            terms = [tuple(row[row >= 0]) for row in arrays['terms']] if 'terms' in arrays else None
+            return cls(arrays['feature_names'].tolist(), arrays['fill'], arrays['weights'], arrays['bias'],
+                       terms, arrays['classes'] if 'classes' in arrays else None, str(arrays['link']))
+    
+    def predict(self, X):
+        """(predictions, class probabilities or None) for a raw feature matrix"""
+        X = np.asarray(X, dtype=np.float64)
+        X = np.where(np.isnan(X), self.fill, X)
+        if self.terms is not None:
+            X = expand_polynomial(X, self.terms)
+        scores = X @ self.weights.T + self.bias
+        if self.link == 'identity':
+            return scores[:, 0], None
+        if self.link == 'logistic':
+            positive = 1 / (1 + np.exp(-scores[:, 0]))
+            return self.classes[(scores[:, 0] > 0).astype(int)], np.column_stack([1 - positive, positive])
+        if self.link == 'softmax':
+            proba = np.exp(scores - scores.max(axis=1, keepdims=True))
+        else:
+            # One-vs-rest, normalized as SGDClassifier.predict_proba does
+            proba = 1 / (1 + np.exp(-scores))
+        totals = proba.sum(axis=1, keepdims=True)
+        proba = np.divide(proba, totals, out=np.full_like(proba, 1 / proba.shape[1]), where=totals > 0)
+        return self.classes[np.argmax(scores, axis=1)], proba
+
 class RegressionAnalyzer:
-    def __init__(self):
-        pass
+    def __init__(self, dataset_cache=None, backend='numpy', render_plots=True):
+        if backend not in ('numpy', 'sklearn'):
+            raise ValueError(f"Unknown solver backend: {backend}")
+        self.dataset_cache = dataset_cache
+        self.backend = backend
+        self.render_plots = render_plots
+    
+    def load_dataframe(self, df, columns=None):
+        """Resolve a file path to a DataFrame through the dataset cache"""
+        if isinstance(df, pd.DataFrame):
+            return df
+        if self.dataset_cache is None:
+            return read_dataset(df)
+        if columns is not None:
+            try:
+                return self.dataset_cache.load_columns(df, columns)[1]
+            except KeyError:
+                # Fall through so missing columns get the usual error below
+                pass
+        return self.dataset_cache.load(df)[1]
     
-    def prepare_data(self, df, target_col, feature_cols):
-        """Prepare data for modeling"""
+    @timed('prepare_data')
+    def prepare_data(self, df, target_col, feature_cols, with_fill=False):
+        """Prepare data for modeling
+
+        with_fill also returns the value each feature's missing entries were
+        filled with, for a FittedModel to fill new rows the same way.
+        """
+        if isinstance(df, PreparedDataset):
+            return df.arrays(target_col, feature_cols, with_fill)
+        df = self.load_dataframe(df, [target_col] + feature_cols)
+        
         # Check if columns exist
         missing_cols = [col for col in [target_col] + feature_cols if col not in df.columns]
         if missing_cols:
             raise ValueError(f"Columns not found in data: {missing_cols}")
         
-        X = df[feature_cols]
-        y = df[target_col]
+        # Cached frames are compacted; widen just the selected columns for fitting
+        X = df[feature_cols].apply(widen)
+        y = widen(df[target_col])
         
-        # Handle missing values
-        X = X.fillna(X.mean())
-        y = y.fillna(y.mean() if pd.api.types.is_numeric_dtype(y) else y.mode()[0])
+        # Handle missing values; a full cached frame reuses the means profiled at upload
+        cached_means = profile_means(df)
+        if all(col in cached_means for col in feature_cols):
+            fill = pd.Series([cached_means[col] for col in feature_cols], index=feature_cols)
+        else:
+            fill = X.mean()
+        X = X.fillna(fill)
+        if pd.api.types.is_numeric_dtype(y):
+            y = y.fillna(cached_means[target_col] if target_col in cached_means else y.mean())
+        else:
+            y = y.fillna(y.mode()[0])
         
+        if with_fill:
+            return X.values, y.values, fill.to_numpy(dtype=np.float64)
         return X.values, y.values
     
-    def perform_linear_regression(self, df, target_col, feature_cols):
-        """Perform linear regression analysis"""
-        X, y = self.prepare_data(df, target_col, feature_cols)
+    @timed('split')
+    def split_data(self, df, X, y, random_state=42, stratify=None):
+        """80/20 train/test split; a PreparedDataset source reuses its cached indices"""
+        if isinstance(df, PreparedDataset):
+            train, test = df.split_indices(len(y), random_state, stratify)
+            return X[train], X[test], y[train], y[test]
+        return train_test_split(X, y, test_size=0.2, random_state=random_state, stratify=stratify)
+    
+    @timed('fit')
+    def fit_least_squares(self, X_train, y_train, X_test):
+        """Standardize, fit OLS and predict; returns (coef, intercept, y_pred)
+
+        coef is on the standardized scale, as with StandardScaler + LinearRegression.
+        """
+        if self.backend == 'sklearn':
+            scaler = StandardScaler()
+            X_train_scaled = scaler.fit_transform(X_train)
+            model = LinearRegression()
+            model.fit(X_train_scaled, y_train)
+            return model.coef_, float(model.intercept_), model.predict(scaler.transform(X_test))
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        X_train = np.asarray(X_train, dtype=np.float64)
+        y_train = np.asarray(y_train, dtype=np.float64)
+        mean = X_train.mean(axis=0)
+        scale = X_train.std(axis=0)
+        # Constant columns (e.g. a polynomial bias term) get a zero coefficient
+        active = scale > 0
+        scale[~active] = 1.0
         
-        # Scale features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
+        # One standardized working copy of the active columns, centred in place
+        Xs = X_train[:, active] if not active.all() else X_train.copy(order='C')
+        Xs -= mean[active]
+        Xs /= scale[active]
+        y_mean = y_train.mean()
+        yc = y_train - y_mean
         
-        # Train model
-        model = LinearRegression()
-        model.fit(X_train_scaled, y_train)
+        coef = np.zeros(X_train.shape[1])
+        if Xs.shape[1]:
+            coef[active] = self._solve_standardized(Xs, yc)
         
-        # Predictions
-        y_pred = model.predict(X_test_scaled)
+        # Fold the scaling into the weights so predictions skip scaling X_test
+        raw_coef = coef / scale
+        y_pred = np.asarray(X_test, dtype=np.float64) @ raw_coef + (y_mean - mean @ raw_coef)
+        return coef, float(y_mean), y_pred
+    
+    def _solve_standardized(self, Xs, yc):
+        """Least squares on standardized columns: Cholesky, then QR, then lstsq"""
+        eps = np.finfo(np.float64).eps
+        # Normal equations are fastest and accurate while the Gram matrix is well conditioned
+        gram = Xs.T @ Xs
+        try:
+            chol = np.linalg.cholesky(gram)
+            diag = np.diag(chol)
+            if diag.min() ** 2 > diag.max() ** 2 * 1e-8:
+                return np.linalg.solve(chol.T, np.linalg.solve(chol, Xs.T @ yc))
+        except np.linalg.LinAlgError:
+            pass
+        
+        q, r = np.linalg.qr(Xs)
+        diag = np.abs(np.diag(r))
+        if diag.min() > diag.max() * max(Xs.shape) * eps:
+            return np.linalg.solve(r, q.T @ yc)
+        # Rank-deficient design: minimum-norm solution, matching LinearRegression
+        return np.linalg.lstsq(Xs, yc, rcond=None)[0]
+    
+    def perform_linear_regression(self, df, target_col, feature_cols, streaming=False, random_state=42):
+        """Perform linear regression analysis"""
+        if streaming:
+            return self.perform_streaming_linear_regression(df, target_col, feature_cols,
+                                                            random_state=random_state)
+        
+        X, y, fill = self.prepare_data(df, target_col, feature_cols, with_fill=True)
+        
+        # Split data
+        X_train, X_test, y_train, y_test = self.split_data(df, X, y, random_state)
+        
+        # Scale features, train model and predict
+        coef, intercept, y_pred = self.fit_least_squares(X_train, y_train, X_test)
         
         # Metrics
-        r2 = r2_score(y_test, y_pred)
-        mse = mean_squared_error(y_test, y_pred)
-        rmse = np.sqrt(mse)
+        r2, mse, rmse = regression_metrics(y_test, y_pred)
         
         # Create visualization
-        fig = self.create_linear_plot(X_test, y_test, y_pred, feature_cols)
+        fig = self.render_plot(self.create_linear_plot, X_test, y_test, y_pred, feature_cols)
         
         return {
             'r2_score': round(r2, 4),
             'mse': round(mse, 4),
             'rmse': round(rmse, 4),
-            'coefficients': model.coef_.tolist(),
-            'intercept': round(float(model.intercept_), 4),
+            'coefficients': coef.tolist(),
+            'intercept': round(intercept, 4),
             'plot': fig,
-            'feature_names': feature_cols
+            'feature_names': feature_cols,
+            'model': FittedModel(feature_cols, fill, *fold_standardization(X_train, coef, intercept))
         }
     
-    def perform_polynomial_regression(self, df, target_col, feature_cols, degree=2):
-        """Perform polynomial regression analysis"""
-        X, y = self.prepare_data(df, target_col, feature_cols)
+    def perform_streaming_linear_regression(self, path, target_col, feature_cols,
+                                            chunk_rows=None, test_size=0.2, random_state=42):
+        """Fit OLS exactly from sufficient statistics accumulated over file chunks
+
+        Memory is O(features^2) regardless of row count. Missing values are
+        mean-imputed using the same single pass: the zero-filled cross products
+        and missing-value indicator products are accumulated separately and
+        combined with the column means once they are known.
+        """
+        columns = list(feature_cols) + [target_col]
+        moments, sample = self.accumulate_stream_moments(path, columns, chunk_rows, test_size, random_state)
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        n, gram, sums = moments['train']
+        mean_vec = sums / n
+        cov = gram / n - np.outer(mean_vec, mean_vec)
         
-        # Create polynomial features
-        poly = PolynomialFeatures(degree=degree)
-        X_train_poly = poly.fit_transform(X_train)
-        X_test_poly = poly.transform(X_test)
+        # Solve in raw units, then report coefficients on the standardized scale
+        std = np.sqrt(np.clip(np.diag(cov)[:-1], 0.0, None))
+        std[std == 0] = 1.0
+        beta = np.linalg.lstsq(cov[:-1, :-1], cov[:-1, -1], rcond=None)[0]
+        intercept = mean_vec[-1] - mean_vec[:-1] @ beta
         
-        # Scale features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train_poly)
-        X_test_scaled = scaler.transform(X_test_poly)
+        # Test SSE/SST as quadratic forms of the test moments: residual = v'a - intercept
+        n, gram, sums = moments['test']
+        v = np.append(-beta, 1.0)
+        sse = v @ gram @ v - 2 * intercept * (v @ sums) + n * intercept ** 2
+        sst = gram[-1, -1] - sums[-1] ** 2 / n
+        mse = max(sse, 0.0) / n
+        r2 = 1 - sse / sst if sst > 0 else 0.0
         
-        # Train model
-        model = LinearRegression()
-        model.fit(X_train_scaled, y_train)
+        X_sample, y_sample = sample[:, :-1], sample[:, -1]
+        fig = self.render_plot(self.create_linear_plot, X_sample, y_sample,
+                               intercept + X_sample @ beta, feature_cols)
         
-        # Predictions
-        y_pred = model.predict(X_test_scaled)
+        return {
+            'r2_score': round(float(r2), 4),
+            'mse': round(float(mse), 4),
+            'rmse': round(float(np.sqrt(mse)), 4),
+            'coefficients': (beta * std).tolist(),
+            # With standardized features the intercept is the training-set target mean
+            'intercept': round(float(mean_vec[-1]), 4),
+            'plot': fig,
+            'feature_names': feature_cols,
+            'streaming': True,
+            'n_rows': int(moments['train'][0] + moments['test'][0]),
+            'model': FittedModel(feature_cols, mean_vec[:-1], beta, intercept)
+        }
+    
+    def accumulate_stream_moments(self, path, columns, chunk_rows=None, test_size=0.2, random_state=42):
+        """Mean-imputed (n, X'X, sum(X)) per split from one pass over file chunks
+
+        Returns ({'train': ..., 'test': ...}, sample) where sample is a bounded,
+        imputed uniform sample of test rows for plotting.
+        """
+        chunk_rows = chunk_rows or app.config['STREAM_CHUNK_ROWS']
+        plot_rows = app.config['STREAM_PLOT_ROWS']
+        n_cols = len(columns)
+        rng = np.random.default_rng(random_state)
+        
+        # Per split: row count, O'O, O'M, M'M, sum(O), sum(M)
+        stats = {split: [0, np.zeros((n_cols, n_cols)), np.zeros((n_cols, n_cols)),
+                         np.zeros((n_cols, n_cols)), np.zeros(n_cols), np.zeros(n_cols)]
+                 for split in ('train', 'test')}
+        sample_rows = np.empty((0, n_cols))
+        sample_keys = np.empty(0)
+        
+        for chunk, is_test in iter_stream_splits(path, columns, chunk_rows, test_size, random_state):
+            if not all(pd.api.types.is_numeric_dtype(chunk[col]) for col in columns):
+                raise ValueError('Streaming linear regression requires numeric columns')
+            values = chunk[columns].to_numpy(dtype=np.float64)
+            missing = np.isnan(values)
+            observed = np.where(missing, 0.0, values)
+            missing = missing.astype(np.float64)
+            
+            for split, mask in (('train', ~is_test), ('test', is_test)):
+                o, m = observed[mask], missing[mask]
+                acc = stats[split]
+                acc[0] += len(o)
+                acc[1] += o.T @ o
+                acc[2] += o.T @ m
+                acc[3] += m.T @ m
+                acc[4] += o.sum(axis=0)
+                acc[5] += m.sum(axis=0)
+            
+            # Bounded uniform sample of test rows for the plot
+            sample_rows, sample_keys = reservoir_update(
+                sample_rows, sample_keys, values[is_test], rng.random(int(is_test.sum())), plot_rows)
+        
+        n_train, n_test = stats['train'][0], stats['test'][0]
+        if n_train < 2 or n_test < 1:
+            raise ValueError('Not enough rows for streaming regression')
+        
+        # Column means over all rows, matching fillna(mean()) in prepare_data
+        observed_counts = (n_train + n_test) - (stats['train'][5] + stats['test'][5])
+        if np.any(observed_counts == 0):
+            raise ValueError('A selected column has no observed values')
+        means = (stats['train'][4] + stats['test'][4]) / observed_counts
+        
+        def imputed_moments(acc):
+            n, oo, om, mm, o_sum, m_sum = acc
+            om_mu = om * means[None, :]
+            gram = oo + om_mu + om_mu.T + mm * np.outer(means, means)
+            return n, gram, o_sum + m_sum * means
+        
+        moments = {split: imputed_moments(stats[split]) for split in ('train', 'test')}
+        return moments, np.where(np.isnan(sample_rows), means, sample_rows)
+    
+    def perform_stepwise_regression(self, df, target_col, feature_cols, direction='forward', streaming=False,
+                                    random_state=42):
+        """Stepwise feature selection scored from one pass of second moments
+
+        The covariance of all candidate columns is computed once (in memory or
+        streamed from disk) and every add/remove step is an O(k²) update in
+        stepwise_path. The subset with the lowest training AIC is reported.
+        """
+        columns = list(feature_cols) + [target_col]
+        if streaming:
+            moments, sample = self.accumulate_stream_moments(df, columns, random_state=random_state)
+            n_train, gram, sums = moments['train']
+            mean = sums / n_train
+            cov = gram / n_train - np.outer(mean, mean)
+            # Re-centre the test moments on the training means
+            n_test, gram, sums = moments['test']
+            test_moments = (n_test, gram - np.outer(sums, mean) - np.outer(mean, sums)
+                            + n_test * np.outer(mean, mean), sums - n_test * mean)
+            X_test, y_test = sample[:, :-1], sample[:, -1]
+            fill = mean[:-1]
+        else:
+            X, y, fill = self.prepare_data(df, target_col, feature_cols, with_fill=True)
+            X_train, X_test, y_train, y_test = self.split_data(df, X, y, random_state)
+            train = np.column_stack([X_train, y_train]).astype(np.float64)
+            n_train = len(train)
+            mean = train.mean(axis=0)
+            train -= mean
+            cov = train.T @ train / n_train
+            test = np.column_stack([X_test, y_test]).astype(np.float64) - mean
+            test_moments = (len(test), test.T @ test, test.sum(axis=0))
+        
+        path = stepwise_path(cov, n_train, test_moments, direction)
+        if not path:
+            raise ValueError('None of the selected feature columns vary, nothing to select from')
+        best = min(path, key=lambda row: row['aic'])
+        chosen = best['selected']
+        selected_names = [feature_cols[j] for j in chosen]
+        
+        raw_coef = best['beta'] / np.sqrt(np.diag(cov))[chosen]
+        y_pred = mean[-1] + (X_test[:, chosen] - mean[chosen]) @ raw_coef
+        fig = self.render_plot(self.create_linear_plot, X_test[:, chosen], y_test, y_pred, selected_names)
+        
+        steps = [{
+            'step': i + 1,
+            'action': row['action'],
+            'feature': feature_cols[row['feature']] if row['feature'] is not None else None,
+            'n_features': len(row['selected']),
+            'aic': round(float(row['aic']), 4),
+            'train_r2': round(float(row['train_r2']), 4),
+            'test_r2': round(float(row['test_r2']), 4),
+            'test_rmse': round(float(np.sqrt(row['test_mse'])), 4),
+            'best': row is best
+        } for i, row in enumerate(path)]
+        
+        results = {
+            'r2_score': round(float(best['test_r2']), 4),
+            'mse': round(float(best['test_mse']), 4),
+            'rmse': round(float(np.sqrt(best['test_mse'])), 4),
+            'coefficients': best['beta'].tolist(),
+            # With standardized features the intercept is the training-set target mean
+            'intercept': round(float(mean[-1]), 4),
+            'plot': fig,
+            'feature_names': selected_names,
+            'stepwise': {'direction': direction, 'criterion': 'AIC', 'path': steps,
+                         'selected': selected_names},
+            'model': FittedModel(selected_names, fill[chosen], raw_coef, mean[-1] - mean[chosen] @ raw_coef)
+        }
+        if streaming:
+            results['streaming'] = True
+            results['n_rows'] = int(n_train + test_moments[0])
+        return results
+    
+    @timed('fit')
+    def fit_blockwise_ridge(self, X_train, y_train, X_test, terms, alpha=None):
+        """Ridge fit on standardized polynomial terms without materializing the expansion
+
+        Row blocks are expanded one at a time to accumulate the Gram matrix
+        and moments, so memory is O(terms^2 + block) rather than O(rows * terms).
+        Returns raw-unit (weights, bias) over the terms and the test-set predictions.
+        """
+        alpha = app.config['POLY_RIDGE_ALPHA'] if alpha is None else alpha
+        n_terms = len(terms)
+        block_rows = max(1, app.config['POLY_BLOCK_BYTES'] // (8 * n_terms))
+        
+        gram = np.zeros((n_terms, n_terms))
+        term_sums = np.zeros(n_terms)
+        cross = np.zeros(n_terms)
+        for start in range(0, len(X_train), block_rows):
+            block = expand_polynomial(X_train[start:start + block_rows], terms)
+            y_block = y_train[start:start + block_rows]
+            gram += block.T @ block
+            term_sums += block.sum(axis=0)
+            cross += block.T @ y_block
+        
+        n = len(X_train)
+        mean = term_sums / n
+        y_mean = float(np.mean(y_train))
+        cov = gram / n - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        std[std == 0] = 1.0
+        
+        # Normal equations of the standardized, centred problem plus the ridge penalty
+        lhs = n * cov / np.outer(std, std) + alpha * np.eye(n_terms)
+        rhs = (cross - mean * y_mean * n) / std
+        coef = np.linalg.solve(lhs, rhs) / std
+        
+        y_pred = np.empty(len(X_test))
+        for start in range(0, len(X_test), block_rows):
+            block = expand_polynomial(X_test[start:start + block_rows], terms)
+            y_pred[start:start + block_rows] = (block - mean) @ coef + y_mean
+        return coef, y_mean - mean @ coef, y_pred
+    
+    def perform_polynomial_regression(self, df, target_col, feature_cols, degree=2, random_state=42,
+                                      interaction_only=False, max_terms=None):
+        """Perform polynomial regression analysis"""
+        X, y, fill = self.prepare_data(df, target_col, feature_cols, with_fill=True)
+        
+        # Decide on the expansion before allocating it
+        plan = plan_polynomial_expansion(len(X), X.shape[1], degree, interaction_only, max_terms)
+        terms = polynomial_terms(X.shape[1], degree, plan['interaction_only'], plan['max_terms'])
+        
+        # Split data
+        X_train, X_test, y_train, y_test = self.split_data(df, X, y, random_state)
+        X_train = np.asarray(X_train, dtype=np.float64)
+        X_test = np.asarray(X_test, dtype=np.float64)
+        
+        if plan['mode'] == 'dense':
+            # Create polynomial features, then scale, train and predict
+            X_train_poly = expand_polynomial(X_train, terms)
+            X_test_poly = expand_polynomial(X_test, terms)
+            coef, intercept, y_pred = self.fit_least_squares(X_train_poly, y_train, X_test_poly)
+            weights, bias = fold_standardization(X_train_poly, coef, intercept)
+        else:
+            weights, bias, y_pred = self.fit_blockwise_ridge(X_train, y_train, X_test, terms)
         
         # Metrics
-        r2 = r2_score(y_test, y_pred)
-        mse = mean_squared_error(y_test, y_pred)
-        rmse = np.sqrt(mse)
+        r2, mse, rmse = regression_metrics(y_test, y_pred)
         
         # Create visualization
-        fig = self.create_polynomial_plot(X_test, y_test, y_pred, feature_cols)
+        fig = self.render_plot(self.create_polynomial_plot, X_test, y_test, y_pred, feature_cols)
         
         return {
             'r2_score': round(r2, 4),
@@ -117,33 +1493,189 @@ class RegressionAnalyzer:
             'rmse': round(rmse, 4),
             'plot': fig,
             'degree': degree,
-            'feature_names': feature_cols
+            'feature_names': feature_cols,
+            'expansion': plan,
+            'model': FittedModel(feature_cols, fill, weights, bias, terms)
         }
     
-    def perform_logistic_regression(self, df, target_col, feature_cols):
-        """Perform logistic regression analysis"""
+    def perform_polynomial_sweep(self, df, target_col, feature_cols, max_degree=5, random_state=42,
+                                 interaction_only=False, max_terms=None):
+        """Fit polynomial degrees 1..max_degree in one pass and pick the best by test R²
+
+        Each degree's new terms are the previous degree's terms multiplied by
+        one more feature, so every column is computed with a single product and
+        degree d's design is a column prefix of degree d+1's. The per-degree
+        solves then run in parallel threads (NumPy releases the GIL). With
+        max_terms the design stops at that many lowest-degree terms.
+        """
+        X, y, fill = self.prepare_data(df, target_col, feature_cols, with_fill=True)
+        n_features = X.shape[1]
+        
+        # The sweep materializes its largest design, so cap the degree at what fits densely
+        requested_degree = max_degree
+        while max_degree > 1:
+            plan = plan_polynomial_expansion(len(X), n_features, max_degree, interaction_only, max_terms,
+                                             policy='downgrade')
+            if plan['mode'] == 'dense' and not plan['notes']:
+                break
+            max_degree -= 1
+        notes = []
+        if max_degree < requested_degree:
+            if app.config['POLY_OVER_BUDGET'] == 'reject':
+                raise ValueError(f'A degree {requested_degree} sweep of {n_features} features does not fit '
+                                 f'the {app.config["POLY_MEMORY_BUDGET_BYTES"] / 2 ** 20:,.0f} MB budget; '
+                                 f'degree {max_degree} is the most that does')
+            notes.append(f'Sweep stopped at degree {max_degree} to stay within the memory budget')
+        if max_terms and count_polynomial_terms(n_features, max_degree, interaction_only) > max_terms:
+            notes.append(f'Capped the sweep at {max_terms:,} lowest-degree terms')
+        
+        X_train, X_test, y_train, y_test = self.split_data(df, X, y, random_state)
+        X_all = np.vstack([X_train, X_test]).astype(np.float64)
+        
+        # Grow the design degree by degree: (term, column) for the newest terms
+        columns = [X_all[:, i] for i in range(n_features)][:max_terms]
+        terms = [(i,) for i in range(len(columns))]
+        frontier = list(zip(terms, columns))
+        n_terms = [len(columns)]
+        for degree in range(2, max_degree + 1):
+            grown = ((term + (idx,), col * X_all[:, idx]) for term, col in frontier
+                     for idx in range(term[-1] + 1 if interaction_only else term[-1], n_features))
+            next_frontier = list(itertools.islice(grown, max_terms and max_terms - len(columns)))
+            if not next_frontier:
+                break
+            frontier = next_frontier
+            terms.extend(term for term, _ in frontier)
+            columns.extend(col for _, col in frontier)
+            n_terms.append(len(columns))
+        design = np.column_stack(columns)
+        del columns, frontier
+        n_train = len(X_train)
+        y_all = np.concatenate([y_train, y_test]).astype(np.float64)
+        
+        def fit_degree(degree):
+            Phi = design[:, :n_terms[degree - 1]]
+            coef, intercept, y_pred = self.fit_least_squares(Phi[:n_train], y_train, Phi)
+            train_r2, _, train_rmse = regression_metrics(y_all[:n_train], y_pred[:n_train])
+            test_r2, test_mse, test_rmse = regression_metrics(y_all[n_train:], y_pred[n_train:])
+            return {
+                'degree': degree,
+                'n_terms': n_terms[degree - 1],
+                'train_r2': round(train_r2, 4),
+                'test_r2': round(test_r2, 4),
+                'train_rmse': round(train_rmse, 4),
+                'test_rmse': round(test_rmse, 4),
+                'test_mse': round(test_mse, 4),
+                'y_pred': y_pred[n_train:],
+                'fit': (coef, intercept)
+            }
+        
+        degrees = range(1, len(n_terms) + 1)
+        with ThreadPoolExecutor(max_workers=min(len(degrees), os.cpu_count() or 1)) as pool:
+            sweep = list(pool.map(fit_degree, degrees))
+        
+        best = max(sweep, key=lambda row: row['test_r2'])
+        fig = self.render_plot(self.create_polynomial_plot, X_test, y_test, best['y_pred'], feature_cols)
+        weights, bias = fold_standardization(design[:n_train, :best['n_terms']], *best['fit'])
+        for row in sweep:
+            del row['y_pred'], row['fit']
+        
+        return {
+            'r2_score': best['test_r2'],
+            'mse': best['test_mse'],
+            'rmse': best['test_rmse'],
+            'plot': fig,
+            'degree': best['degree'],
+            'feature_names': feature_cols,
+            'sweep': sweep,
+            'expansion': {'n_terms': best['n_terms'], 'mode': 'dense', 'interaction_only': interaction_only,
+                          'max_terms': max_terms, 'notes': notes},
+            'model': FittedModel(feature_cols, fill, weights, bias, terms[:best['n_terms']])
+        }
+    
+    def perform_cross_validation(self, df, target_col, feature_cols, regression_type, n_folds=5,
+                                 degree=2, random_state=42, interaction_only=False, max_terms=None):
+        """k-fold (stratified for logistic) cross-validation across a process pool
+
+        X and y are written once as .npy files that every worker memory-maps,
+        and workers derive their own fold indices from the seed, so only file
+        paths and a fold number are sent to each process. A polynomial
+        expansion is planned once here, against the memory budget shared by
+        the concurrent folds, and every fold fits the same planned terms.
+        """
         X, y = self.prepare_data(df, target_col, feature_cols)
+        classes = None
+        if regression_type == 'logistic':
+            classes, y = np.unique(y, return_inverse=True)
+            if np.bincount(y).min() < n_folds:
+                raise ValueError(f'Each class needs at least {n_folds} rows for {n_folds}-fold cross-validation')
+        elif len(X) < n_folds:
+            raise ValueError(f'Need at least {n_folds} rows for {n_folds}-fold cross-validation')
         
-        # Convert to binary if needed
-        unique_classes = np.unique(y)
-        if len(unique_classes) > 2:
-            # Take first two classes for binary classification
-            mask = (y == unique_classes[0]) | (y == unique_classes[1])
-            X = X[mask]
-            y = y[mask]
-            unique_classes = np.unique(y)
+        n_workers = min(n_folds, app.config['CV_WORKERS'])
+        plan, terms = None, None
+        if regression_type == 'polynomial':
+            plan = plan_polynomial_expansion(len(X), X.shape[1], degree, interaction_only, max_terms,
+                                             budget=app.config['POLY_MEMORY_BUDGET_BYTES'] // n_workers)
+            terms = polynomial_terms(X.shape[1], degree, plan['interaction_only'], plan['max_terms'])
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        scratch = os.path.join(app.config['CV_FOLDER'], uuid.uuid4().hex)
+        os.makedirs(scratch)
+        try:
+            x_path, y_path = os.path.join(scratch, 'X.npy'), os.path.join(scratch, 'y.npy')
+            np.save(x_path, np.ascontiguousarray(X, dtype=np.float64))
+            np.save(y_path, np.asarray(y, dtype=np.int64 if classes is not None else np.float64))
+            del X, y
+            
+            fold_args = [(x_path, y_path, fold, n_folds, regression_type, random_state, terms,
+                          plan and plan['mode']) for fold in range(n_folds)]
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=process_context()) as pool:
+                folds = list(pool.map(_cross_validate_fold, *zip(*fold_args)))
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        
+        metric_names = ['accuracy'] if regression_type == 'logistic' else ['r2_score', 'mse', 'rmse']
+        summary = {name: round(float(np.mean([f[name] for f in folds])), 4) for name in metric_names}
+        spread = {name: round(float(np.std([f[name] for f in folds])), 4) for name in metric_names}
+        fig = self.render_plot(self.create_cv_plot, folds, metric_names[0])
+        
+        results = dict(summary)
+        results.update({
+            'plot': fig,
+            'feature_names': feature_cols,
+            'cv': {'n_folds': n_folds, 'stratified': regression_type == 'logistic',
+                   'folds': folds, 'mean': summary, 'std': spread, 'metrics': metric_names}
+        })
+        if regression_type == 'logistic':
+            # Pooled out-of-fold confusion matrix
+            results['confusion_matrix'] = np.sum([f.pop('confusion_matrix') for f in folds], axis=0).tolist()
+            results['classes'] = classes.tolist()
+        if regression_type == 'polynomial':
+            results['degree'] = degree
+            results['expansion'] = plan
+        return results
+    
+    def perform_logistic_regression(self, df, target_col, feature_cols, streaming=False, random_state=42):
+        """Perform logistic regression analysis"""
+        if streaming:
+            return self.perform_streaming_logistic_regression(df, target_col, feature_cols,
+                                                              random_state=random_state)
+        
+        X, y, fill = self.prepare_data(df, target_col, feature_cols, with_fill=True)
+        unique_classes, class_counts = np.unique(y, return_counts=True)
+        if len(unique_classes) < 2:
+            raise ValueError('Logistic regression needs at least two target classes')
+        
+        # Split data (stratified unless some class is too rare to appear on both sides)
+        X_train, X_test, y_train, y_test = self.split_data(
+            df, X, y, random_state, stratify=y if class_counts.min() >= 2 else None)
         
         # Scale features
         scaler = StandardScaler()
         X_train_scaled = scaler.fit_transform(X_train)
         X_test_scaled = scaler.transform(X_test)
         
-        # Train model
-        model = LogisticRegression(max_iter=1000)
-        model.fit(X_train_scaled, y_train)
+        # Train model: binary or multinomial, all classes in one solve
+        model = self.fit_logistic(X_train_scaled, y_train, random_state)
         
         # Predictions
         y_pred = model.predict(X_test_scaled)
@@ -151,10 +1683,10 @@ class RegressionAnalyzer:
         
         # Metrics
         accuracy = accuracy_score(y_test, y_pred)
-        conf_matrix = confusion_matrix(y_test, y_pred)
+        conf_matrix = confusion_matrix(y_test, y_pred, labels=model.classes_)
         
         # Create visualization
-        fig = self.create_logistic_plot(X_test, y_test, y_pred_proba, feature_cols)
+        fig = self.render_plot(self.create_logistic_plot, X_test, y_test, y_pred_proba, feature_cols, model.classes_)
         
         return {
             'accuracy': round(accuracy, 4),
@@ -163,99 +1695,958 @@ class RegressionAnalyzer:
             'intercept': model.intercept_.tolist(),
             'plot': fig,
             'feature_names': feature_cols,
-            'classes': unique_classes.tolist()
+            'classes': model.classes_.tolist(),
+            'model': FittedModel(feature_cols, fill, model.coef_ / scaler.scale_,
+                                 model.intercept_ - (model.coef_ / scaler.scale_) @ scaler.mean_,
+                                 classes=model.classes_, link='softmax' if len(model.classes_) > 2 else 'logistic')
+        }
+    
+    @timed('fit')
+    def fit_logistic(self, X_train, y_train, random_state=42):
+        """Fit a (multinomial for 3+ classes) logistic regression
+
+        High-cardinality targets use the SAG solver, warm-started from a fit
+        on a row sample so the full-data passes begin near the optimum.
+        Inputs are already standardized, which SAG needs to converge quickly.
+        """
+        model = LogisticRegression(max_iter=1000)
+        n_classes = len(np.unique(y_train))
+        if n_classes > app.config['LOGISTIC_WARM_START_CLASSES']:
+            model.set_params(solver='sag', warm_start=True, random_state=random_state)
+            sample_rows = app.config['LOGISTIC_WARM_START_ROWS']
+            if len(y_train) > sample_rows:
+                sample = np.random.default_rng(random_state).choice(len(y_train), sample_rows, replace=False)
+                # The sample must see every class so the coefficient matrix has the full shape
+                if len(np.unique(y_train[sample])) == n_classes:
+                    model.fit(X_train[sample], y_train[sample])
+        model.fit(X_train, y_train)
+        return model
+    
+    def perform_streaming_logistic_regression(self, path, target_col, feature_cols, chunk_rows=None,
+                                              test_size=0.2, random_state=42, tol=1e-4, n_iter_no_change=3):
+        """Fit logistic regression incrementally over file chunks with early stopping
+
+        A first pass collects imputation means, scaling moments, the class set
+        and a bounded held-out evaluation sample. Each following epoch streams
+        the training rows through SGDClassifier.partial_fit, stopping once the
+        held-out accuracy stops improving. A last pass scores the full test split.
+        """
+        chunk_rows = chunk_rows or app.config['STREAM_CHUNK_ROWS']
+        eval_rows = app.config['STREAM_EVAL_ROWS']
+        columns = list(feature_cols) + [target_col]
+        n_features = len(feature_cols)
+        rng = np.random.default_rng(random_state)
+        
+        def split_chunk(chunk):
+            X = chunk[feature_cols].to_numpy(dtype=np.float64)
+            return X, chunk[target_col].to_numpy()
+        
+        # Pass 1: moments, target statistics and the held-out evaluation sample
+        n_rows = 0
+        obs_sum, obs_count = np.zeros(n_features), np.zeros(n_features)
+        train_sum, train_sq, train_missing, n_train = (np.zeros(n_features), np.zeros(n_features),
+                                                       np.zeros(n_features), 0)
+        y_sum, y_count, y_counts = 0.0, 0, pd.Series(dtype=np.int64)
+        y_numeric = True
+        eval_sample, eval_keys = np.empty((0, n_features + 1), dtype=object), np.empty(0)
+        for chunk, is_test in iter_stream_splits(path, columns, chunk_rows, test_size, random_state):
+            X, y = split_chunk(chunk)
+            missing = np.isnan(X)
+            observed = np.where(missing, 0.0, X)
+            n_rows += len(X)
+            obs_sum += observed.sum(axis=0)
+            obs_count += (~missing).sum(axis=0)
+            train_sum += observed[~is_test].sum(axis=0)
+            train_sq += (observed[~is_test] ** 2).sum(axis=0)
+            train_missing += missing[~is_test].sum(axis=0)
+            n_train += int((~is_test).sum())
+            
+            y_series = chunk[target_col]
+            y_numeric = y_numeric and pd.api.types.is_numeric_dtype(y_series)
+            if y_numeric:
+                y_sum += float(y_series.sum())
+                y_count += int(y_series.count())
+            y_counts = y_counts.add(y_series.value_counts(), fill_value=0)
+            
+            # Bounded uniform sample of held-out rows for early stopping
+            eval_sample, eval_keys = reservoir_update(
+                eval_sample, eval_keys, np.column_stack([X[is_test], y[is_test]]).astype(object),
+                rng.random(int(is_test.sum())), eval_rows)
+        
+        eval_X, eval_y = eval_sample[:, :n_features].astype(np.float64), eval_sample[:, -1]
+        if n_train < 2 or len(eval_y) == 0:
+            raise ValueError('Not enough rows for streaming regression')
+        if np.any(obs_count == 0):
+            raise ValueError('A selected column has no observed values')
+        
+        # Imputation uses all-row means; scaling uses the imputed training split
+        means = obs_sum / obs_count
+        scale_mean = (train_sum + train_missing * means) / n_train
+        scale_var = (train_sq + train_missing * means ** 2) / n_train - scale_mean ** 2
+        scale_std = np.sqrt(np.clip(scale_var, 0.0, None))
+        scale_std[scale_std == 0] = 1.0
+        y_fill = y_sum / y_count if y_numeric else y_counts.idxmax()
+        
+        def transform(X, y):
+            X = (np.where(np.isnan(X), means, X) - scale_mean) / scale_std
+            y = pd.Series(y).fillna(y_fill).infer_objects().to_numpy()
+            return X, y
+        
+        unique_classes = np.unique(pd.Series(y_counts.index).to_numpy())
+        if y_numeric and y_counts.sum() < n_rows:
+            unique_classes = np.unique(np.append(unique_classes, y_fill))
+        if len(unique_classes) < 2:
+            raise ValueError('Logistic regression needs at least two target classes')
+        
+        eval_X, eval_y = transform(eval_X, eval_y)
+        
+        # Epochs of partial_fit over the training rows, early-stopped on the held-out sample
+        model = SGDClassifier(loss='log_loss', random_state=random_state)
+        best_score, best_state, stale_epochs = -np.inf, None, 0
+        for epoch in range(app.config['STREAM_MAX_EPOCHS']):
+            for chunk, is_test in iter_stream_splits(path, columns, chunk_rows, test_size, random_state):
+                X, y = transform(*split_chunk(chunk[~is_test]))
+                if len(y):
+                    model.partial_fit(X, y, classes=unique_classes)
+            score = model.score(eval_X, eval_y)
+            if score > best_score + tol:
+                best_score, stale_epochs = score, 0
+                best_state = (model.coef_.copy(), model.intercept_.copy())
+            else:
+                stale_epochs += 1
+                if stale_epochs >= n_iter_no_change:
+                    break
+        model.coef_, model.intercept_ = best_state
+        
+        # Final pass: exact accuracy and confusion matrix over the whole test split
+        conf_matrix = np.zeros((len(unique_classes), len(unique_classes)), dtype=np.int64)
+        for chunk, is_test in iter_stream_splits(path, columns, chunk_rows, test_size, random_state):
+            X, y = transform(*split_chunk(chunk[is_test]))
+            if len(y):
+                y_pred = model.predict(X)
+                np.add.at(conf_matrix, (np.searchsorted(unique_classes, y),
+                                        np.searchsorted(unique_classes, y_pred)), 1)
+        accuracy = np.trace(conf_matrix) / max(conf_matrix.sum(), 1)
+        
+        # Plot on the unscaled held-out sample, as the in-memory path does
+        eval_X_raw = eval_X * scale_std + scale_mean
+        fig = self.render_plot(self.create_logistic_plot, eval_X_raw, eval_y,
+                               model.predict_proba(eval_X), feature_cols, model.classes_)
+        
+        return {
+            'accuracy': round(float(accuracy), 4),
+            'confusion_matrix': conf_matrix.tolist(),
+            'coefficients': model.coef_.tolist(),
+            'intercept': model.intercept_.tolist(),
+            'plot': fig,
+            'feature_names': feature_cols,
+            'classes': unique_classes.tolist(),
+            'streaming': True,
+            'n_rows': int(n_rows),
+            'epochs': epoch + 1,
+            'model': FittedModel(feature_cols, means, model.coef_ / scale_std,
+                                 model.intercept_ - (model.coef_ / scale_std) @ scale_mean,
+                                 classes=model.classes_, link='ovr' if len(model.classes_) > 2 else 'logistic')
+        }
+    
+    def sampling_report(self, refit, sample, target_col, results, total_rows, random_state=42, level=0.95):
+        """How far a fit on a row sample is likely to be from the same fit on every row
+
+        Metric intervals resample the held-out predictions of results['model'].
+        Coefficient margins come from refit (frame -> results dict) on bootstrap
+        resamples of the sample, shrunk by the finite-population correction:
+        the full data is a fixed population, so a sample of all of it has no error.
+        """
+        rng = np.random.default_rng(random_state)
+        fitted = results['model']
+        z = NormalDist().inv_cdf(0.5 + level / 2)
+        
+        # Rebuild the held-out rows of the fit (the split depends only on row count and labels)
+        X, y = self.prepare_data(sample, target_col, fitted.feature_names)
+        stratify = None
+        if fitted.classes is not None and np.unique(y, return_counts=True)[1].min() >= 2:
+            stratify = y
+        _, X_test, _, y_test = self.split_data(sample, X, y, random_state, stratify)
+        y_pred = fitted.predict(X_test)[0]
+        
+        draws = []
+        for _ in range(app.config['SAMPLE_METRIC_RESAMPLES']):
+            rows = rng.integers(0, len(y_test), len(y_test))
+            if fitted.classes is not None:
+                draws.append({'accuracy': float(np.mean(y_pred[rows] == y_test[rows]))})
+            else:
+                r2, mse, rmse = regression_metrics(y_test[rows], y_pred[rows])
+                draws.append({'r2_score': r2, 'mse': mse, 'rmse': rmse})
+        tail = (1 - level) / 2 * 100
+        intervals = {metric: [round(float(v), 4) for v in np.percentile([d[metric] for d in draws], [tail, 100 - tail])]
+                     for metric in draws[0]}
+        
+        def coefficient_vector(fit_results):
+            if 'coefficients' in fit_results:
+                return np.ravel(np.asarray(fit_results['coefficients'], dtype=np.float64))
+            return np.ravel(fit_results['model'].weights)
+        
+        base = coefficient_vector(results)
+        refits = []
+        for _ in range(app.config['SAMPLE_BOOTSTRAP_ROUNDS']):
+            resample = sample.iloc[rng.integers(0, len(sample), len(sample))].reset_index(drop=True)
+            try:
+                vector = coefficient_vector(refit(resample))
+            except ValueError:
+                # e.g. a rare class missing from the resample
+                continue
+            if vector.shape == base.shape:
+                refits.append(vector)
+        
+        fpc = np.sqrt(max(0.0, 1 - len(sample) / total_rows))
+        report = {
+            'rows': len(sample),
+            'total_rows': int(total_rows),
+            'fraction': round(len(sample) / total_rows, 4),
+            'level': level,
+            'metric_intervals': intervals,
+            'bootstrap_rounds': len(refits),
+            'coefficient_margins': None,
+            'relative_coefficient_error': None
         }
+        if len(refits) >= 2:
+            margins = z * np.std(refits, axis=0, ddof=1) * fpc
+            report['coefficient_margins'] = [round(float(m), 4) for m in margins]
+            base_norm = np.linalg.norm(base)
+            if base_norm > 0:
+                report['relative_coefficient_error'] = round(float(np.linalg.norm(margins) / base_norm), 4)
+        return report
+    
+    @timed('plot')
+    def render_plot(self, plot_method, *args):
+        """Run a create_*_plot method on the render pool and wait for its image"""
+        if not self.render_plots:
+            return None
+        return render_pool().submit(plot_method, *args).result()
+    
+    def _sample_index(self, n):
+        """Row indices to draw: all of them, or a fixed random subset for large n"""
+        max_points = app.config['PLOT_MAX_POINTS']
+        if n <= max_points:
+            return np.arange(n)
+        return np.sort(np.random.default_rng(0).choice(n, max_points, replace=False))
+    
+    def _points(self, ax, x, y, **kwargs):
+        """Scatter plot that draws at most PLOT_MAX_POINTS markers"""
+        idx = self._sample_index(len(x))
+        if len(idx) < len(x):
+            kwargs['label'] = f"{kwargs.get('label', 'Data')} (sample of {len(idx):,} / {len(x):,})"
+            kwargs['alpha'] = 0.3
+        ax.scatter(np.asarray(x)[idx], np.asarray(y)[idx], **kwargs)
+    
+    def _curve(self, ax, x, y, **kwargs):
+        """Line through points sorted by x, thinned to PLOT_MAX_POINTS vertices"""
+        order = np.argsort(x)
+        if len(order) > app.config['PLOT_MAX_POINTS']:
+            order = order[np.linspace(0, len(order) - 1, app.config['PLOT_MAX_POINTS']).astype(int)]
+        ax.plot(x[order], y[order], **kwargs)
+    
+    def _residuals(self, ax, y_pred, residuals, title):
+        """Residual plot: scatter for small test sets, hexbin density beyond PLOT_MAX_POINTS"""
+        if len(y_pred) > app.config['PLOT_MAX_POINTS']:
+            hb = ax.hexbin(y_pred, residuals, gridsize=60, mincnt=1, bins='log', cmap='Blues')
+            ax.figure.colorbar(hb, ax=ax, label='Points per bin (log)')
+        else:
+            ax.scatter(y_pred, residuals, alpha=0.6)
+        ax.axhline(y=0, color='red', linestyle='--')
+        ax.set_xlabel('Predicted Values')
+        ax.set_ylabel('Residuals')
+        ax.set_title(title)
     
     def create_linear_plot(self, X_test, y_test, y_pred, feature_names):
         """Create visualization for linear regression"""
-        plt.figure(figsize=(10, 5))
+        fig = Figure(figsize=(10, 5))
+        ax = fig.subplots()
         
         if X_test.shape[1] == 1:
-            plt.scatter(X_test, y_test, color='blue', alpha=0.6, label='Actual')
-            plt.scatter(X_test, y_pred, color='red', alpha=0.6, label='Predicted')
-            plt.xlabel(feature_names[0])
-            plt.ylabel('Target')
-            plt.legend()
-            plt.title('Linear Regression: Actual vs Predicted')
+            self._points(ax, X_test[:, 0], y_test, color='blue', alpha=0.6, label='Actual')
+            self._points(ax, X_test[:, 0], y_pred, color='red', alpha=0.6, label='Predicted')
+            ax.set_xlabel(feature_names[0])
+            ax.set_ylabel('Target')
+            ax.legend()
+            ax.set_title('Linear Regression: Actual vs Predicted')
         else:
-            residuals = y_test - y_pred
-            plt.scatter(y_pred, residuals, alpha=0.6)
-            plt.axhline(y=0, color='red', linestyle='--')
-            plt.xlabel('Predicted Values')
-            plt.ylabel('Residuals')
-            plt.title('Residual Plot')
+            self._residuals(ax, y_pred, y_test - y_pred, 'Residual Plot')
         
-        plt.tight_layout()
-        return self.fig_to_base64()
+        fig.tight_layout()
+        return self.save_plot(fig)
     
     def create_polynomial_plot(self, X_test, y_test, y_pred, feature_names):
         """Create visualization for polynomial regression"""
-        plt.figure(figsize=(10, 5))
+        fig = Figure(figsize=(10, 5))
+        ax = fig.subplots()
         
         if X_test.shape[1] == 1:
-            # Sort for smooth curve
-            sorted_idx = np.argsort(X_test[:, 0])
-            X_sorted = X_test[sorted_idx]
-            y_pred_sorted = y_pred[sorted_idx]
-            
-            plt.scatter(X_test, y_test, color='blue', alpha=0.6, label='Actual')
-            plt.plot(X_sorted, y_pred_sorted, color='red', linewidth=2, label='Polynomial Fit')
-            plt.xlabel(feature_names[0])
-            plt.ylabel('Target')
-            plt.legend()
-            plt.title('Polynomial Regression Fit')
+            self._points(ax, X_test[:, 0], y_test, color='blue', alpha=0.6, label='Actual')
+            self._curve(ax, X_test[:, 0], y_pred, color='red', linewidth=2, label='Polynomial Fit')
+            ax.set_xlabel(feature_names[0])
+            ax.set_ylabel('Target')
+            ax.legend()
+            ax.set_title('Polynomial Regression Fit')
         else:
-            residuals = y_test - y_pred
-            plt.scatter(y_pred, residuals, alpha=0.6)
-            plt.axhline(y=0, color='red', linestyle='--')
-            plt.xlabel('Predicted Values')
-            plt.ylabel('Residuals')
-            plt.title('Residual Plot - Polynomial Regression')
+            self._residuals(ax, y_pred, y_test - y_pred, 'Residual Plot - Polynomial Regression')
         
-        plt.tight_layout()
-        return self.fig_to_base64()
+        fig.tight_layout()
+        return self.save_plot(fig)
     
-    def create_logistic_plot(self, X_test, y_test, y_pred_proba, feature_names):
+    def create_logistic_plot(self, X_test, y_test, y_pred_proba, feature_names, classes=None):
         """Create visualization for logistic regression"""
-        plt.figure(figsize=(10, 5))
+        fig = Figure(figsize=(10, 5))
+        ax = fig.subplots()
         
-        if X_test.shape[1] == 1:
-            # Sort for smooth curve
-            sorted_idx = np.argsort(X_test[:, 0])
-            X_sorted = X_test[sorted_idx]
-            proba_sorted = y_pred_proba[sorted_idx, 1]
-            
-            plt.scatter(X_test, y_test, color='blue', alpha=0.6, label='Actual')
-            plt.plot(X_sorted, proba_sorted, color='red', linewidth=2, label='Probability')
-            plt.xlabel(feature_names[0])
-            plt.ylabel('Probability/Class')
-            plt.legend()
-            plt.title('Logistic Regression Probability')
+        if y_pred_proba.shape[1] > 2:
+            self._multiclass_probabilities(ax, X_test, np.asarray(y_test), y_pred_proba, feature_names, classes)
+        elif X_test.shape[1] == 1:
+            self._points(ax, X_test[:, 0], y_test, color='blue', alpha=0.6, label='Actual')
+            self._curve(ax, X_test[:, 0], y_pred_proba[:, 1], color='red', linewidth=2, label='Probability')
+            ax.set_xlabel(feature_names[0])
+            ax.set_ylabel('Probability/Class')
+            ax.legend()
+            ax.set_title('Logistic Regression Probability')
         else:
-            plt.hist(y_pred_proba[:, 1], bins=20, alpha=0.7, edgecolor='black')
-            plt.xlabel('Predicted Probability')
-            plt.ylabel('Frequency')
-            plt.title('Probability Distribution')
+            ax.hist(y_pred_proba[:, 1], bins=20, alpha=0.7, edgecolor='black')
+            ax.set_xlabel('Predicted Probability')
+            ax.set_ylabel('Frequency')
+            ax.set_title('Probability Distribution')
         
-        plt.tight_layout()
-        return self.fig_to_base64()
+        fig.tight_layout()
+        return self.save_plot(fig)
+    
+    def create_cv_plot(self, folds, metric):
+        """Bar chart of a metric across cross-validation folds"""
+        fig = Figure(figsize=(10, 5))
+        ax = fig.subplots()
+        values = [fold[metric] for fold in folds]
+        ax.bar([f"Fold {fold['fold']}" for fold in folds], values, color='steelblue', edgecolor='black')
+        ax.axhline(y=np.mean(values), color='red', linestyle='--', label=f'Mean {np.mean(values):.4f}')
+        ax.set_ylabel(metric.replace('_', ' ').title())
+        ax.legend()
+        ax.set_title('Cross-Validation Results by Fold')
+        fig.tight_layout()
+        return self.save_plot(fig)
+    
+    def _multiclass_probabilities(self, ax, X_test, y_test, y_pred_proba, feature_names, classes):
+        """Per-class probability view for the most frequent classes"""
+        labels, counts = np.unique(y_test, return_counts=True)
+        shown = labels[np.argsort(-counts)[:10]]
+        columns = {label: i for i, label in enumerate(classes)}
+        
+        if X_test.shape[1] == 1:
+            # Probability of each class along the single feature
+            for label in shown:
+                self._curve(ax, X_test[:, 0], y_pred_proba[:, columns[label]], linewidth=2, label=f'P({label})')
+            ax.set_xlabel(feature_names[0])
+            ax.set_ylabel('Predicted Probability')
+            ax.set_title('Logistic Regression Class Probabilities')
+        else:
+            # How much probability each class's own rows receive for that class
+            bins = np.linspace(0, 1, 21)
+            for label in shown:
+                own = y_pred_proba[y_test == label, columns[label]]
+                ax.hist(own, bins=bins, histtype='step', linewidth=2, label=f'{label} (n={len(own)})')
+            ax.set_xlabel('Predicted Probability of the Actual Class')
+            ax.set_ylabel('Frequency')
+            ax.set_title('Per-Class Probability Distribution')
+        ax.legend(fontsize='small')
     
-    def fig_to_base64(self):
-        """Convert matplotlib figure to base64 string for HTML display"""
+    def save_plot(self, fig):
+        """Render a figure into the content-addressed plot store and return its plot id"""
+        fmt = app.config['PLOT_FORMAT']
         buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-        buf.seek(0)
-        image_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-        plt.close()
-        return image_base64
+        fig.savefig(buf, format=fmt, dpi=100, bbox_inches='tight')
+        return store_plot(buf.getvalue(), fmt)
+
+def _cross_validate_fold(x_path, y_path, fold, n_folds, regression_type, random_state, terms=None,
+                         expansion_mode=None):
+    """Process-pool entry point: fit and score one fold over the memory-mapped arrays
+
+    Polynomial folds get the parent's planned terms and expansion mode.
+    """
+    X = np.load(x_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+    if regression_type == 'logistic':
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    else:
+        splitter = KFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    train_idx, test_idx = list(splitter.split(np.zeros(len(y)), y))[fold]
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+    result = {'fold': fold + 1, 'train_rows': len(train_idx), 'test_rows': len(test_idx)}
+    
+    if regression_type == 'logistic':
+        scaler = StandardScaler()
+        model = analyzer.fit_logistic(scaler.fit_transform(X_train), np.asarray(y_train), random_state)
+        y_pred = model.predict(scaler.transform(X_test))
+        result['accuracy'] = round(float(accuracy_score(y_test, y_pred)), 4)
+        # Labels are class codes 0..K-1 and StratifiedKFold puts every class in every fold
+        result['confusion_matrix'] = confusion_matrix(y_test, y_pred, labels=np.arange(int(y.max()) + 1)).tolist()
+        return result
+    
+    if expansion_mode == 'blockwise':
+        _, _, y_pred = analyzer.fit_blockwise_ridge(X_train, np.asarray(y_train), X_test, terms)
+    else:
+        if terms is not None:
+            X_train, X_test = expand_polynomial(X_train, terms), expand_polynomial(X_test, terms)
+        _, _, y_pred = analyzer.fit_least_squares(X_train, y_train, X_test)
+    r2, mse, rmse = regression_metrics(y_test, y_pred)
+    result.update({'r2_score': round(r2, 4), 'mse': round(mse, 4), 'rmse': round(rmse, 4)})
+    return result
+
+PLOT_MIMETYPES = {'png': 'image/png', 'webp': 'image/webp', 'svg': 'image/svg+xml'}
+PLOT_ID_PATTERN = re.compile(r'^[0-9a-f]{64}\.(png|webp|svg)$')
+
+def store_plot(data, fmt):
+    """Write image bytes under their SHA-256 and return the plot id '<digest>.<fmt>'"""
+    plot_id = f'{hashlib.sha256(data).hexdigest()}.{fmt}'
+    path = os.path.join(app.config['PLOT_FOLDER'], plot_id)
+    if not os.path.exists(path):
+        os.makedirs(app.config['PLOT_FOLDER'], exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    return plot_id
+
+def remove_plot(plot_id):
+    """Delete a stored plot; cached results still naming it are then treated as stale"""
+    try:
+        os.remove(os.path.join(app.config['PLOT_FOLDER'], plot_id))
+    except OSError:
+        pass
+
+_thread_pools = {}
+_thread_pools_lock = threading.Lock()
+
+def thread_pool(name, max_workers):
+    """Named thread pool, created per process so forked workers get their own"""
+    key = (os.getpid(), name)
+    with _thread_pools_lock:
+        if key not in _thread_pools:
+            _thread_pools[key] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        return _thread_pools[key]
+
+def render_pool():
+    """Thread pool for plot rendering"""
+    return thread_pool('render', app.config['RENDER_WORKERS'])
+
+def process_context():
+    """multiprocessing context for worker pools that never forks the server process itself
+
+    The server is multi-threaded (request threads, render and preload pools),
+    and a child forked while another thread holds a lock deadlocks on first
+    use. Pool workers are forked from a forkserver that has imported only
+    this module, or spawned where forkserver is unavailable.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    # Import the app once in the fork server instead of in every pool worker. The fork
+    # server resolves the name from its working directory (the app's, under gunicorn
+    # or python app.py); elsewhere each worker imports the module itself, just slower.
+    context.set_forkserver_preload([__name__])
+    return context
 
-# Initialize analyzer
-analyzer = RegressionAnalyzer()
+MODEL_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+class ModelStore:
+    """Fitted models saved as .npz under their content hash, hot ones kept loaded
+
+    Every save or lookup refreshes a file's access time; once the folder is
+    over max_bytes the least recently used models are deleted, and /predict
+    answers 404 for them.
+    """
+    
+    def __init__(self, folder, max_entries, max_bytes):
+        self.folder = folder
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _path(self, model_id):
+        return os.path.join(self.folder, model_id + '.npz')
+    
+    def save(self, model):
+        """Persist a FittedModel and return its model id"""
+        model_id = model.digest()[:32]
+        path = self._path(model_id)
+        if not os.path.exists(path):
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+            with open(tmp_path, 'wb') as fh:
+                fh.write(model.to_bytes())
+            os.replace(tmp_path, path)
+            self._trim(keep=model_id)
+        else:
+            self._touch(model_id)
+        self._remember(model_id, model)
+        return model_id
+    
+    def get(self, model_id):
+        """The FittedModel for an id, or None if it was never saved or has been evicted"""
+        with self._lock:
+            model = self._models.get(model_id)
+            if model is not None:
+                self._models.move_to_end(model_id)
+        if model is not None:
+            # Loaded models are used too, as far as the disk quota is concerned
+            self._touch(model_id)
+            return model
+        if not MODEL_ID_PATTERN.match(model_id):
+            return None
+        try:
+            with open(self._path(model_id), 'rb') as fh:
+                model = FittedModel.from_bytes(fh.read())
+        except FileNotFoundError:
+            return None
+        self._touch(model_id)
+        self._remember(model_id, model)
+        return model
+    
+    def _touch(self, model_id):
+        path = self._path(model_id)
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            pass
+    
+    def _trim(self, keep):
+        """Delete the least recently used models while the folder is over max_bytes"""
+        models = []
+        for entry in os.scandir(self.folder):
+            model_id, ext = os.path.splitext(entry.name)
+            if ext == '.npz' and MODEL_ID_PATTERN.match(model_id) and model_id != keep:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                models.append((stat.st_atime_ns, stat.st_size, model_id))
+        total = sum(size for _, size, _ in models) + os.path.getsize(self._path(keep))
+        for _, size, model_id in sorted(models):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(model_id))
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._models.pop(model_id, None)
+            total -= size
+    
+    def _remember(self, model_id, model):
+        with self._lock:
+            self._models[model_id] = model
+            self._models.move_to_end(model_id)
+            while len(self._models) > self.max_entries:
+                self._models.popitem(last=False)
+
+DATASET_ID_PATTERN = re.compile(r'^[0-9a-f]{64}\.(csv|xlsx|xls)$')
+DATASET_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+class UploadStore:
+    """Uploaded files stored once each, as '<sha256>.<ext>', within a size quota
+
+    Those file names are the dataset ids forms and sessions refer to. Every
+    use refreshes a file's access time (its mtime, part of the digest memo
+    key, is left alone); uploads unused for ttl_seconds, then the least
+    recently used ones while the store is over max_bytes, are deleted and
+    on_evict is called with their digest.
+    """
+    
+    def __init__(self, folder, max_bytes, ttl_seconds, on_evict=None):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+    
+    def path(self, dataset_id):
+        """Path of a stored upload, marked as just used, or None if it is not (or no longer) stored"""
+        if not DATASET_ID_PATTERN.match(dataset_id or ''):
+            return None
+        path = os.path.join(self.folder, dataset_id)
+        try:
+            self._touch(path)
+        except FileNotFoundError:
+            return None
+        return path
+    
+    def save(self, file, extension, chunk_size=1024 * 1024):
+        """Store an uploaded file, hashing it on the way; returns its dataset id"""
+        sha = hashlib.sha256()
+        tmp_path = os.path.join(self.folder, f'{uuid.uuid4().hex}.upload.tmp')
+        with open(tmp_path, 'wb') as fh:
+            for block in iter(lambda: file.stream.read(chunk_size), b''):
+                sha.update(block)
+                fh.write(block)
+        return self._place(tmp_path, sha.hexdigest(), extension)
+    
+    def adopt(self, tmp_path, extension):
+        """Move a file written elsewhere in the upload folder into the store; returns its dataset id"""
+        return self._place(tmp_path, file_digest(tmp_path), extension)
+    
+    def _place(self, tmp_path, digest, extension):
+        dataset_id = f'{digest}.{extension}'
+        path = os.path.join(self.folder, dataset_id)
+        with self._lock:
+            if os.path.exists(path):
+                # Same content uploaded before: keep the stored copy
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        remember_digest(path, digest)
+        self._touch(path)
+        self.evict(keep={dataset_id})
+        return dataset_id
+    
+    def _touch(self, path):
+        stat = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+    
+    def evict(self, keep=()):
+        """Delete expired uploads, then the least recently used ones while over quota"""
+        stored = []
+        for entry in os.scandir(self.folder):
+            if DATASET_ID_PATTERN.match(entry.name) and entry.name not in keep:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                stored.append((stat.st_atime, stat.st_size, entry.name))
+        total = sum(size for _, size, _ in stored)
+        total += sum(os.path.getsize(os.path.join(self.folder, name)) for name in keep
+                     if os.path.exists(os.path.join(self.folder, name)))
+        
+        expired_before = time.time() - self.ttl_seconds
+        evicted = []
+        with self._lock:
+            for used, size, name in sorted(stored):
+                if used >= expired_before and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except FileNotFoundError:
+                    continue
+                total -= size
+                evicted.append(name.split('.')[0])
+        for digest in evicted:
+            if self.on_evict is not None:
+                self.on_evict(digest)
+        return evicted
+
+class ResultCache:
+    """Memoized analysis results keyed by dataset hash and model spec
+
+    A byte-bounded in-memory LRU sits in front of an optional directory of
+    pickled results, so entries survive restarts and are shared with job workers.
+    """
+    
+    def __init__(self, max_bytes, folder=None, disk_max_bytes=0):
+        self.max_bytes = max_bytes
+        self.folder = folder
+        self.disk_max_bytes = disk_max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(dataset_hash, spec):
+        """Cache key for a spec; feature order and unused options do not matter"""
+        return (dataset_hash, spec['regression_type'], spec['target_column'],
+                tuple(sorted(spec['feature_columns'])),
+                (spec['degree'], spec['interaction_only'], spec['max_terms'], spec['sweep'])
+                if spec['regression_type'] == 'polynomial' else None,
+                spec['random_state'], spec['streaming'], spec['cv_folds'], spec['stepwise'], spec['sample_rows'],
+                app.config['PLOT_FORMAT'])
+    
+    def _disk_path(self, key):
+        name = hashlib.sha256(repr(key[1:]).encode('utf-8')).hexdigest()
+        return os.path.join(self.folder, key[0], name + '.pkl')
+    
+    def get(self, key):
+        """Return a copy of the cached results for a key, or None"""
+        results = self._lookup(key)
+        # Plots are shared by content, so one evicted with another dataset makes this entry stale
+        if results is not None and results.get('plot') and \
+                not os.path.exists(os.path.join(app.config['PLOT_FOLDER'], results['plot'])):
+            return None
+        return results
+    
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return dict(entry[0])
+        if not self.folder:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as fh:
+                payload = fh.read()
+        except OSError:
+            return None
+        results = pickle.loads(payload)
+        self._remember(key, results, len(payload))
+        return dict(results)
+    
+    def put(self, key, results):
+        """Store results in memory and, if enabled, on disk"""
+        payload = pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, results, len(payload))
+        if self.folder:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+            with open(tmp_path, 'wb') as fh:
+                fh.write(payload)
+            os.replace(tmp_path, path)
+            self._trim_disk()
+    
+    def _remember(self, key, results, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (dict(results), size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+    
+    def _trim_disk(self):
+        # Evict the least recently written files once the disk tier is over budget
+        files = []
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            # The entry's plot goes with it, or the plot folder would grow without bound
+            try:
+                with open(path, 'rb') as fh:
+                    plot_id = pickle.load(fh).get('plot')
+            except (OSError, EOFError, pickle.UnpicklingError):
+                plot_id = None
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            if plot_id:
+                remove_plot(plot_id)
+            total -= size
+    
+    def invalidate(self, dataset_hash):
+        """Forget every result computed from a dataset; returns the plot ids they referenced"""
+        plots = set()
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == dataset_hash]:
+                results, size = self._entries.pop(key)
+                self.current_bytes -= size
+                plots.add(results.get('plot'))
+        if self.folder:
+            folder = os.path.join(self.folder, dataset_hash)
+            for name in os.listdir(folder) if os.path.isdir(folder) else []:
+                try:
+                    with open(os.path.join(folder, name), 'rb') as fh:
+                        plots.add(pickle.load(fh).get('plot'))
+                except (OSError, EOFError, pickle.UnpicklingError):
+                    pass
+            shutil.rmtree(folder, ignore_errors=True)
+        plots.discard(None)
+        return plots
+
+# Initialize shared dataset cache, analyzer, model store, result cache and upload store
+dataset_cache = DatasetCache(app.config['DATASET_CACHE_MAX_BYTES'])
+preloader = DatasetPreloader(dataset_cache, app.config['PRELOAD_WORKERS'])
+analyzer = RegressionAnalyzer(dataset_cache, backend=app.config['SOLVER_BACKEND'])
+model_store = ModelStore(app.config['MODEL_FOLDER'], app.config['MODEL_CACHE_ENTRIES'],
+                         app.config['MODEL_MAX_BYTES'])
+result_cache = ResultCache(app.config['RESULT_CACHE_MAX_BYTES'], app.config['RESULT_CACHE_FOLDER'],
+                           app.config['RESULT_CACHE_DISK_MAX_BYTES'])
+
+def forget_dataset(digest):
+    """Drop everything derived from an upload that left the store
+
+    Saved models are kept, since their ids may already be in use for
+    predictions; the model store's own quota bounds them.
+    """
+    dataset_cache.discard(digest)
+    preloader.forget(digest)
+    shutil.rmtree(columnar_dir(digest), ignore_errors=True)
+    for plot_id in result_cache.invalidate(digest):
+        remove_plot(plot_id)
+
+upload_store = UploadStore(app.config['UPLOAD_FOLDER'], app.config['UPLOAD_MAX_BYTES'],
+                           app.config['UPLOAD_TTL_SECONDS'], on_evict=forget_dataset)
+
+class WarmUpAnalyzer(RegressionAnalyzer):
+    """RegressionAnalyzer that renders plots inline and discards the images"""
+    
+    def render_plot(self, plot_method, *args):
+        return plot_method(*args)
+    
+    def save_plot(self, fig):
+        fig.savefig(io.BytesIO(), format=app.config['PLOT_FORMAT'], dpi=100, bbox_inches='tight')
+        return None
+
+warmed_up = threading.Event()
+
+def warm_up():
+    """Run each kind of fit and plot once on a small synthetic frame
+
+    Called before serving (wsgi.py, or the __main__ block) so the first
+    request does not pay for sklearn's and matplotlib's deferred imports,
+    font loading or template compilation. Under gunicorn's preload_app this
+    happens once in the parent and forked workers share the pages. Nothing
+    is written to the upload, result or plot stores.
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(200, 2)), columns=['a', 'b'])
+    df['y'] = df['a'] - 0.5 * df['b'] ** 2 + rng.normal(scale=0.1, size=len(df))
+    df['label'] = (df['y'] > df['y'].median()).astype(int)
+    model = WarmUpAnalyzer(backend=app.config['SOLVER_BACKEND'])
+    model.perform_linear_regression(df, 'y', ['a', 'b'])
+    model.perform_polynomial_regression(df, 'y', ['a', 'b'], degree=2)
+    model.perform_logistic_regression(df, 'label', ['a', 'b'])
+    for template in ('index.html', 'upload.html', 'results.html'):
+        try:
+            app.jinja_env.get_template(template)
+        except TemplateNotFound:
+            app.logger.warning('Template %s not found during warm-up', template)
+    # Keep the warm-up fits out of the served latency histograms
+    stage_seconds.reset()
+    warmed_up.set()
+
+@app.before_request
+def start_request_spans():
+    g.request_started = time.perf_counter()
+    _request_spans.spans = []
+
+@app.after_request
+def add_server_timing(response):
+    """Report the request's spans (and its total time) in a Server-Timing header"""
+    spans = getattr(_request_spans, 'spans', None) or []
+    _request_spans.spans = None
+    total = time.perf_counter() - g.get('request_started', time.perf_counter())
+    request_seconds.observe(request.endpoint or 'unmatched', total)
+    entries = []
+    for record in spans:
+        entry = f"{record['stage']};dur={record['seconds'] * 1000:.1f}"
+        if 'rows' in record:
+            rows, cols = record['rows'], record.get('cols', '?')
+            entry += f';desc="rows={rows} cols={cols}"'
+        entries.append(entry)
+    entries.append(f'total;dur={total * 1000:.1f}')
+    response.headers['Server-Timing'] = ', '.join(entries)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Stage and request latency histograms in the Prometheus text format
+
+    Counts are this server process's only: stages that run inside the job or
+    cross-validation pools, and other gunicorn workers, are not included.
+    """
+    lines = stage_seconds.render() + request_seconds.render()
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once warmed up with a writable upload folder, else 503"""
+    checks = {
+        'warmed_up': warmed_up.is_set(),
+        'upload_folder_writable': os.access(app.config['UPLOAD_FOLDER'], os.W_OK)
+    }
+    status = 'ready' if all(checks.values()) else 'starting'
+    return jsonify({'status': status, 'checks': checks, 'pid': os.getpid()}), 200 if status == 'ready' else 503
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/plots/<plot_id>')
+def plot_image(plot_id):
+    """Serve a stored plot; ids are content hashes, so responses never change"""
+    if not PLOT_ID_PATTERN.match(plot_id):
+        abort(404)
+    path = os.path.join(app.config['PLOT_FOLDER'], plot_id)
+    if not os.path.exists(path):
+        abort(404)
+    response = send_file(path, mimetype=PLOT_MIMETYPES[plot_id.rsplit('.', 1)[1]],
+                         etag=plot_id.split('.')[0], max_age=365 * 24 * 3600, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+def ingest_excel_sheet(workbook_path, sheet):
+    """Convert one sheet of a stored workbook to a stored CSV; returns its dataset id
+
+    Every later preview, parse and analysis reads the CSV, never the workbook.
+    """
+    sheets = list_excel_sheets(workbook_path)
+    if sheet not in sheets:
+        raise ValueError(f'Sheet not found in workbook: {sheet}')
+    csv_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{uuid.uuid4().hex}.sheet.tmp')
+    with span('excel_convert'):
+        convert_excel_sheet(workbook_path, sheet, csv_path)
+    return upload_store.adopt(csv_path, 'csv')
+
+def remember_upload_name(name, dataset_id, keep=20):
+    """Map a user-facing file name to its dataset id in this session"""
+    names = session.get('dataset_names', {})
+    names.pop(name, None)
+    names[name] = dataset_id
+    # Cookie-backed session: only the most recent names are kept
+    session['dataset_names'] = dict(list(names.items())[-keep:])
+
+def preview_upload(dataset_id, name, regression_type):
+    """Render the column picker for a stored upload and start its background parse"""
+    save_path = upload_store.path(dataset_id)
+    dataset_hash = file_digest(save_path)
+    
+    # Bounded reads only: the preview does not wait for the full parse
+    with span('preview') as record:
+        df, numeric_columns = preview_dataset(save_path)
+        record['rows'], record['cols'] = df.shape
+    columns = df.columns.tolist()
+
+    if not numeric_columns:
+        return render_template('upload.html', error='No numeric columns found in the data', regression_type=regression_type)
+
+    if not (dataset_id.endswith('.csv') and is_large_dataset(save_path)):
+        # Parse in the background so the cache is warm when /analyze arrives;
+        # files too large to hold in memory are streamed from disk instead
+        preloader.submit(save_path, dataset_hash, numeric_columns)
+
+    # Store small metadata in session (dataset id + columns) rather than full data
+    remember_upload_name(name, dataset_id)
+    session['dataset'] = dataset_id
+    session['dataset_hash'] = dataset_hash
+    session['regression_type'] = regression_type
+    session['columns'] = columns
+    session['numeric_columns'] = numeric_columns
+
+    return render_template('upload.html', 
+                         columns=columns,
+                         numeric_columns=numeric_columns,
+                         regression_type=regression_type,
+                         df_preview=df.head(10).to_dict('records'),
+                         dataset=dataset_id,
+                         uploaded_filename=name,
+                         dataset_hash=dataset_hash)
+
 @app.route('/upload', methods=['GET', 'POST'])
 def upload():
     if request.method == 'POST':
@@ -271,36 +2662,24 @@ def upload():
             if filename == '':
                 return render_template('upload.html', error='Invalid filename', regression_type=regression_type)
 
-            save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(save_path)
-
-            # Read file based on saved extension
-            if filename.endswith('.csv'):
-                df = pd.read_csv(save_path)
-            elif filename.endswith(('.xls', '.xlsx')):
-                df = pd.read_excel(save_path)
-            else:
+            if not filename.endswith(('.csv', '.xls', '.xlsx')):
                 return render_template('upload.html', error='Unsupported file format', regression_type=regression_type)
 
-            # Get column information
-            columns = df.columns.tolist()
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-
-            if not numeric_columns:
-                return render_template('upload.html', error='No numeric columns found in the data', regression_type=regression_type)
-
-            # Store small metadata in session (filename + columns) rather than full data
-            session['uploaded_filename'] = filename
-            session['regression_type'] = regression_type
-            session['columns'] = columns
-            session['numeric_columns'] = numeric_columns
-
-            return render_template('upload.html', 
-                                 columns=columns,
-                                 numeric_columns=numeric_columns,
-                                 regression_type=regression_type,
-                                 df_preview=df.head(10).to_dict('records'),
-                                 uploaded_filename=filename)
+            # Stored by content, so identical uploads share one file and names never collide
+            with span('upload_save') as record:
+                dataset_id = upload_store.save(file, filename.rsplit('.', 1)[1])
+                record['bytes'] = os.path.getsize(upload_store.path(dataset_id))
+
+            if filename.endswith(('.xls', '.xlsx')):
+                workbook_path = upload_store.path(dataset_id)
+                sheets = list_excel_sheets(workbook_path)
+                if len(sheets) > 1:
+                    # Nothing is read from the workbook until the user picks a sheet
+                    return render_template('upload.html', regression_type=regression_type,
+                                           workbook=dataset_id, workbook_name=filename, sheets=sheets)
+                dataset_id = ingest_excel_sheet(workbook_path, sheets[0])
+
+            return preview_upload(dataset_id, filename, regression_type)
             
         except Exception as e:
             return render_template('upload.html', error=f'Error: {str(e)}', regression_type=request.form.get('regression_type', 'linear'))
@@ -309,99 +2688,769 @@ def upload():
     regression_type = request.args.get('regression_type', 'linear')
     return render_template('upload.html', regression_type=regression_type)
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
+@app.route('/upload/sheet', methods=['POST'])
+def upload_sheet():
+    """Ingest the chosen sheet of a multi-sheet workbook uploaded by /upload"""
+    regression_type = request.form.get('regression_type', 'linear')
     try:
-        # Get form data
-        regression_type = request.form.get('regression_type', 'linear')
-        target_column = request.form.get('target_column')
-        feature_columns = request.form.getlist('feature_columns')
-        
-        print(f"DEBUG: Regression Type: {regression_type}")
-        print(f"DEBUG: Target Column: {target_column}")
-        print(f"DEBUG: Feature Columns: {feature_columns}")
-        
-        if not target_column or not feature_columns:
-            return render_template('upload.html', error='Please select both target and feature columns', regression_type=regression_type)
-        
-        # Load data from previously saved uploaded file (stored by /upload)
-        uploaded_filename = request.form.get('uploaded_filename') or session.get('uploaded_filename')
-        if not uploaded_filename:
-            return render_template('upload.html', error='No uploaded file found. Please upload your file first.', regression_type=regression_type)
-
-        saved_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(uploaded_filename))
-        if not os.path.exists(saved_path):
-            return render_template('upload.html', error='Uploaded file not found on server. Please re-upload.', regression_type=regression_type)
-
-        # Read file from disk
-        if saved_path.endswith('.csv'):
-            df = pd.read_csv(saved_path)
-        elif saved_path.endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(saved_path)
+        workbook = request.form.get('workbook', '')
+        workbook_path = upload_store.path(workbook) if workbook.endswith(('.xls', '.xlsx')) else None
+        if workbook_path is None:
+            return render_template('upload.html', error='Uploaded workbook not found. Please re-upload.',
+                                   regression_type=regression_type)
+        dataset_id = ingest_excel_sheet(workbook_path, request.form.get('sheet'))
+        name = secure_filename(request.form.get('workbook_name', '')) or workbook
+        return preview_upload(dataset_id, name, regression_type)
+    except Exception as e:
+        return render_template('upload.html', error=f'Error: {str(e)}', regression_type=regression_type)
+
+@app.route('/datasets/<dataset_hash>/schema', methods=['GET'])
+def dataset_schema(dataset_hash):
+    """Background parse state of an upload and its confirmed numeric columns"""
+    status = preloader.status(dataset_hash)
+    if status is None:
+        return jsonify({'error': 'Unknown dataset'}), 404
+    return jsonify(status)
+
+@app.route('/datasets/<dataset_hash>/suggestions', methods=['GET'])
+def feature_suggestions(dataset_hash):
+    """Numeric columns ranked by absolute correlation with ?target=, read from the upload profile"""
+    correlations = read_correlations(dataset_hash) if DATASET_HASH_PATTERN.match(dataset_hash) else None
+    if correlations is None:
+        return jsonify({'error': 'Unknown or not yet profiled dataset'}), 404
+    names, matrix = correlations
+    target = request.args.get('target', '')
+    if target not in names:
+        return jsonify({'error': f'Not a numeric column: {target}'}), 400
+    row = np.asarray(matrix[names.index(target)])
+    features = [{'name': name, 'correlation': finite_or_none(r)} for name, r in zip(names, row) if name != target]
+    # Columns without a defined correlation (constant or empty) go last
+    features.sort(key=lambda feature: -abs(feature['correlation']) if feature['correlation'] is not None
+                  else math.inf)
+    return jsonify({'target': target, 'features': features})
+
+class AnalysisRequestError(ValueError):
+    """Invalid analysis input, reported back to the user on the upload page"""
+
+def int_field(form, name, default=None):
+    """A whole-number form field (default when absent), or AnalysisRequestError naming it"""
+    value = form.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise AnalysisRequestError(f'{name} must be a whole number, got {value!r}') from None
+
+def analysis_spec_from_form(form):
+    """Validate an analysis form submission into a plain, picklable spec dict"""
+    regression_type = form.get('regression_type', 'linear')
+    target_column = form.get('target_column')
+    feature_columns = form.getlist('feature_columns')
+    
+    if not target_column or not feature_columns:
+        raise AnalysisRequestError('Please select both target and feature columns')
+    if regression_type not in ('linear', 'polynomial', 'logistic'):
+        raise AnalysisRequestError(f'Invalid regression type: {regression_type}')
+    
+    # Load data from a stored upload: by dataset id, or by a file name uploaded in this session
+    dataset_id = form.get('dataset')
+    uploaded_filename = form.get('uploaded_filename')
+    if not dataset_id and uploaded_filename:
+        dataset_id = session.get('dataset_names', {}).get(uploaded_filename)
+        if dataset_id is None:
+            raise AnalysisRequestError(f'No upload named {uploaded_filename} in this session. Please upload it first.')
+    dataset_id = dataset_id or session.get('dataset')
+    if not dataset_id:
+        raise AnalysisRequestError('No uploaded file found. Please upload your file first.')
+
+    saved_path = upload_store.path(dataset_id)
+    if saved_path is None:
+        raise AnalysisRequestError('Uploaded file not found on server. Please re-upload.')
+    
+    cv_folds = int_field(form, 'cv_folds', 0)
+    if cv_folds == 1 or cv_folds < 0:
+        raise AnalysisRequestError('Cross-validation needs at least 2 folds')
+    stepwise = form.get('stepwise') or None
+    if stepwise not in (None, 'forward', 'backward'):
+        raise AnalysisRequestError(f'Invalid stepwise direction: {stepwise}')
+    degree = int_field(form, 'degree', 2)
+    if degree < 1:
+        raise AnalysisRequestError('Polynomial degree must be at least 1')
+    max_terms = int_field(form, 'max_terms')
+    if max_terms is not None and max_terms < 1:
+        raise AnalysisRequestError('max_terms must be at least 1')
+    sweep = regression_type == 'polynomial' and form.get('sweep') == 'on'
+    sample_rows = int_field(form, 'sample_rows', 0)
+    if sample_rows < 0 or 0 < sample_rows < 100:
+        raise AnalysisRequestError('A sample needs at least 100 rows')
+    # Fast mode fits one split of a sample; cross-validation and sweeps always use every row
+    if cv_folds or sweep:
+        sample_rows = 0
+    
+    return {
+        'regression_type': regression_type,
+        'target_column': target_column,
+        'feature_columns': feature_columns,
+        'degree': degree,
+        'random_state': int_field(form, 'random_state', 42),
+        'interaction_only': form.get('interaction_only') == 'on',
+        'max_terms': max_terms,
+        'sweep': sweep,
+        'cv_folds': cv_folds,
+        # Selection runs on a single split, so cross-validation takes precedence
+        'stepwise': stepwise if regression_type == 'linear' and not cv_folds else None,
+        'saved_path': saved_path,
+        'sample_rows': sample_rows,
+        # Cross-validation needs the arrays in memory, so it never streams; samples are small enough not to
+        'streaming': regression_type in ('linear', 'logistic') and not cv_folds and not sample_rows and (
+            form.get('streaming') == 'on' or is_large_dataset(saved_path))
+    }
+
+def load_spec_sample(spec):
+    """(digest, sample) for a sampled spec, stratified on the target for logistic regression"""
+    stratify = spec['target_column'] if spec['regression_type'] == 'logistic' else None
+    return dataset_cache.load_sample(spec['saved_path'], [spec['target_column']] + spec['feature_columns'],
+                                     spec['sample_rows'], stratify, spec['random_state'])
+
+def refine_form_fields(spec):
+    """(name, value) form fields that rerun a sampled spec on every row"""
+    fields = [('regression_type', spec['regression_type']), ('target_column', spec['target_column'])]
+    fields += [('feature_columns', column) for column in spec['feature_columns']]
+    fields += [('dataset', os.path.basename(spec['saved_path'])),
+               ('degree', spec['degree']), ('random_state', spec['random_state'])]
+    if spec['stepwise']:
+        fields.append(('stepwise', spec['stepwise']))
+    if spec['interaction_only']:
+        fields.append(('interaction_only', 'on'))
+    if spec['max_terms']:
+        fields.append(('max_terms', spec['max_terms']))
+    return fields
+
+def run_analysis(spec, report=None):
+    """Load the data for a spec, run the fit and prepare the results.html payload
+
+    report, if given, is called with the name of each stage as it starts.
+    """
+    report = report or (lambda stage: None)
+    target_column = spec['target_column']
+    feature_columns = spec['feature_columns']
+    saved_path = spec['saved_path']
+    streaming = spec['streaming']
+    
+    # Resubmitting the same spec against the same file skips the split, fit and plot
+    cache_key = ResultCache.make_key(file_digest(saved_path), spec)
+    results = result_cache.get(cache_key)
+    if results is not None:
+        report('done')
+        return results
+    
+    report('loading')
+    with span('load') as record:
+        if spec['sample_rows']:
+            # Fast mode: a random sample, drawn once and cached, stands in for the file
+            dataset_hash, df = load_spec_sample(spec)
+        elif streaming:
+            # Out-of-core fit: never hold the full dataset, preview only the first chunk
+            df = next(iter_dataset_chunks(saved_path, [target_column] + feature_columns, 5))
         else:
-            return render_template('upload.html', error='Unsupported file format', regression_type=regression_type)
-        
-        # Perform regression analysis
-        if regression_type == 'linear':
-            results = analyzer.perform_linear_regression(df, target_column, feature_columns)
-        elif regression_type == 'polynomial':
-            degree = int(request.form.get('degree', 2))
-            results = analyzer.perform_polynomial_regression(df, target_column, feature_columns, degree)
-        elif regression_type == 'logistic':
-            results = analyzer.perform_logistic_regression(df, target_column, feature_columns)
+            # Only the selected columns are read, from the columnar sidecar written at upload
+            try:
+                dataset_hash, df = dataset_cache.load_columns(saved_path, [target_column] + feature_columns)
+            except KeyError:
+                dataset_hash, df = dataset_cache.load(saved_path)
+        if not streaming:
+            record['rows'], record['cols'] = df.shape
+    
+    report('fitting')
+    with span('analysis', regression_type=spec['regression_type']) as record:
+        results = fit_analysis(analyzer, spec, df)
+        if 'n_rows' in results:
+            record['rows'] = results['n_rows']
+    with span('describe'):
+        describe_results(results, spec, df)
+    
+    result_cache.put(cache_key, results)
+    report('done')
+    return results
+
+def fit_spec(model, spec, df):
+    """Dispatch a spec to the matching RegressionAnalyzer method
+
+    df is the loaded frame (or a PreparedDataset); streaming specs read the
+    file at spec['saved_path'] instead. The results keep their 'model'.
+    """
+    regression_type = spec['regression_type']
+    target_column = spec['target_column']
+    feature_columns = spec['feature_columns']
+    streaming = spec['streaming']
+    random_state = spec['random_state']
+    
+    # Streaming fits read straight from disk; everything else uses the loaded frame
+    source = spec['saved_path'] if streaming else df
+    
+    # Perform regression analysis
+    if spec['cv_folds']:
+        results = model.perform_cross_validation(df, target_column, feature_columns, regression_type,
+                                                 n_folds=spec['cv_folds'], degree=spec['degree'],
+                                                 random_state=random_state,
+                                                 interaction_only=spec['interaction_only'],
+                                                 max_terms=spec['max_terms'])
+    elif regression_type == 'linear' and spec['stepwise']:
+        results = model.perform_stepwise_regression(source, target_column, feature_columns, spec['stepwise'],
+                                                    streaming=streaming, random_state=random_state)
+    elif regression_type == 'linear':
+        results = model.perform_linear_regression(source, target_column, feature_columns,
+                                                  streaming=streaming, random_state=random_state)
+    elif regression_type == 'polynomial' and spec['sweep']:
+        results = model.perform_polynomial_sweep(df, target_column, feature_columns, spec['degree'],
+                                                 random_state=random_state,
+                                                 interaction_only=spec['interaction_only'],
+                                                 max_terms=spec['max_terms'])
+    elif regression_type == 'polynomial':
+        results = model.perform_polynomial_regression(df, target_column, feature_columns, spec['degree'],
+                                                      random_state=random_state,
+                                                      interaction_only=spec['interaction_only'],
+                                                      max_terms=spec['max_terms'])
+    else:
+        results = model.perform_logistic_regression(source, target_column, feature_columns,
+                                                    streaming=streaming, random_state=random_state)
+    return results
+
+def fit_analysis(model, spec, df):
+    """Run a spec with fit_spec and save its fitted model
+
+    Sampled specs fit on the sample in df and also report how far the fit is
+    likely to be from one on the whole file.
+    """
+    results = fit_spec(model, spec, df)
+    if spec['sample_rows']:
+        # Refits keep the reported features (stepwise selection is not re-run) and skip plots
+        refit_spec = dict(spec, stepwise=None, feature_columns=results['feature_names'])
+        quiet = RegressionAnalyzer(backend=model.backend, render_plots=False)
+        results['sampling'] = model.sampling_report(lambda frame: fit_spec(quiet, refit_spec, frame), df,
+                                                    spec['target_column'], results,
+                                                    df.attrs.get('total_rows', len(df)), spec['random_state'])
+        results['sampling']['stratified'] = spec['regression_type'] == 'logistic'
+    
+    fitted = results.pop('model', None)
+    if fitted is not None:
+        results['model_id'] = model_store.save(fitted)
+    return results
+
+def describe_results(results, spec, df):
+    """Add the display fields results.html expects, in place"""
+    regression_type = spec['regression_type']
+    target_column = spec['target_column']
+    feature_columns = spec['feature_columns']
+    
+    # Add additional information to results
+    results['regression_type'] = regression_type
+    results['target_column'] = target_column
+    results['feature_columns'] = feature_columns
+    if isinstance(df, PreparedDataset):
+        df = df.df[unique_columns([target_column] + feature_columns)]
+    results['data_preview'] = df.head(5).to_dict('records')
+    if results.get('sampling'):
+        results['refine_fields'] = refine_form_fields(spec)
+    # Normalize coefficients and prepare table for template
+    try:
+        # For logistic, coefficients may be 2D (classes x features)
+        if 'coefficients' in results:
+            coeffs = results['coefficients']
+            if isinstance(coeffs, list) and len(coeffs) > 0 and isinstance(coeffs[0], list):
+                # Flatten to first row for display
+                coeffs_display = coeffs[0]
+            else:
+                coeffs_display = coeffs
+            # ensure numeric
+            coeffs_display = [float(c) for c in coeffs_display]
+            results['coefficients_display'] = coeffs_display
+            # pair features and coefficients (truncate/pad safely)
+            paired = []
+            # Stepwise selection reports coefficients for the chosen subset only
+            for i, feat in enumerate(results.get('feature_names', feature_columns)):
+                coef_val = coeffs_display[i] if i < len(coeffs_display) else 0.0
+                paired.append((feat, coef_val))
+            results['coef_table'] = paired
+            # Multiclass logistic: one coefficient row per class
+            if regression_type == 'logistic' and len(results.get('classes', [])) > 2 and \
+                    isinstance(coeffs[0], list) and len(coeffs) == len(results['classes']):
+                results['class_coef_table'] = [(cls, [float(c) for c in row], float(b)) for cls, row, b
+                                               in zip(results['classes'], coeffs, results['intercept'])]
         else:
-            return render_template('upload.html', error=f'Invalid regression type: {regression_type}', regression_type=regression_type)
-        
-        # Add additional information to results
-        results['regression_type'] = regression_type
-        results['target_column'] = target_column
-        results['feature_columns'] = feature_columns
-        results['data_preview'] = df.head(5).to_dict('records')
-        # Normalize coefficients and prepare table for template
-        try:
-            # For logistic, coefficients may be 2D (classes x features)
-            if 'coefficients' in results:
-                coeffs = results['coefficients']
-                if isinstance(coeffs, list) and len(coeffs) > 0 and isinstance(coeffs[0], list):
-                    # Flatten to first row for display
-                    coeffs_display = coeffs[0]
+            results['coefficients_display'] = []
+            results['coef_table'] = []
+
+        # normalize intercept to float for template formatting
+        if 'intercept' in results:
+            try:
+                results['intercept'] = float(results['intercept'])
+            except Exception:
+                # if intercept is list (logistic), take first element
+                if isinstance(results['intercept'], (list, tuple)) and len(results['intercept']) > 0:
+                    results['intercept'] = float(results['intercept'][0])
                 else:
-                    coeffs_display = coeffs
-                # ensure numeric
-                coeffs_display = [float(c) for c in coeffs_display]
-                results['coefficients_display'] = coeffs_display
-                # pair features and coefficients (truncate/pad safely)
-                paired = []
-                for i, feat in enumerate(feature_columns):
-                    coef_val = coeffs_display[i] if i < len(coeffs_display) else 0.0
-                    paired.append((feat, coef_val))
-                results['coef_table'] = paired
-            else:
-                results['coefficients_display'] = []
-                results['coef_table'] = []
+                    results['intercept'] = 0.0
+    except Exception:
+        # In case anything goes wrong preparing display values, fallback to safe defaults
+        results.setdefault('coef_table', [])
+        results.setdefault('intercept', 0.0)
+
+# Presentation-only fields left out of batch API responses
+BATCH_DISPLAY_KEYS = ('plot', 'data_preview', 'coef_table', 'coefficients_display', 'class_coef_table',
+                      'refine_fields')
 
-            # normalize intercept to float for template formatting
-            if 'intercept' in results:
+def run_batch_analysis(saved_path, specs, plots=False):
+    """Run many specs against one dataset, sharing its parse, imputation and splits
+
+    In-memory specs fit from one PreparedDataset over the union of their
+    columns. Returns one dict per spec: structured results, or an 'error'.
+    """
+    dataset_hash = file_digest(saved_path)
+    model = RegressionAnalyzer(dataset_cache, backend=app.config['SOLVER_BACKEND'], render_plots=plots)
+    shared = None
+    entries = []
+    for spec in specs:
+        cache_key = ResultCache.make_key(dataset_hash, spec)
+        results = result_cache.get(cache_key)
+        cached = results is not None
+        if not cached:
+            columns = [spec['target_column']] + spec['feature_columns']
+            try:
+                if spec['sample_rows']:
+                    df = load_spec_sample(spec)[1]
+                elif spec['streaming']:
+                    df = next(iter_dataset_chunks(saved_path, columns, 5))
+                else:
+                    if shared is None:
+                        needed = unique_columns(col for other in specs
+                                                if not other['streaming'] and not other['sample_rows']
+                                                for col in [other['target_column']] + other['feature_columns'])
+                        try:
+                            shared = PreparedDataset(dataset_cache.load_columns(saved_path, needed)[1])
+                        except KeyError:
+                            shared = PreparedDataset(dataset_cache.load(saved_path)[1])
+                    df = shared
+                results = fit_analysis(model, spec, df)
+                describe_results(results, spec, df)
+            except Exception as e:
+                entries.append({'error': str(e)})
+                continue
+            if plots:
+                # With its plot the payload is the same one run_analysis would cache
+                result_cache.put(cache_key, results)
+        
+        entry = {key: value for key, value in results.items() if key not in BATCH_DISPLAY_KEYS}
+        if results.get('class_coef_table'):
+            # describe_results keeps only the first intercept for display
+            entry['intercept'] = [intercept for _, _, intercept in results['class_coef_table']]
+        if plots:
+            entry['plot'] = results['plot']
+        entry['cached'] = cached
+        entries.append(entry)
+    return entries
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled"""
+
+class JobQueueFull(Exception):
+    """Raised when too many analysis jobs are already queued or running"""
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+JOB_FINISHED = ('done', 'failed', 'cancelled')
+
+class JobStore:
+    """Job records kept as files, so every server process can answer for every job
+
+    '<id>.json' holds a job's status and is replaced whole on each update,
+    '<id>.pkl' the results of a finished job, and an '<id>.cancel' file marks
+    a cancellation request for the worker running it to pick up.
+    """
+    
+    def __init__(self, folder):
+        self.folder = folder
+    
+    def _path(self, job_id, suffix):
+        return os.path.join(self.folder, job_id + suffix)
+    
+    def _write(self, path, data):
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    
+    def create(self, job_id, regression_type):
+        """Record a newly queued job as owned by this server process"""
+        os.makedirs(self.folder, exist_ok=True)
+        record = {'job_id': job_id, 'status': 'queued', 'stage': 'queued', 'submitted': time.time(),
+                  'regression_type': regression_type, 'host': socket.gethostname(), 'pid': os.getpid()}
+        self._write(self._path(job_id, '.json'), json.dumps(record).encode())
+    
+    def read(self, job_id):
+        """A job's record, or None for malformed or unknown ids"""
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        try:
+            with open(self._path(job_id, '.json'), 'rb') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+    
+    def update(self, job_id, **fields):
+        """Merge fields into a job's record; returns the new record, or None if the job is gone"""
+        record = self.read(job_id)
+        if record is not None:
+            record.update(fields)
+            if fields.get('status') in JOB_FINISHED:
+                record['finished'] = time.time()
+            self._write(self._path(job_id, '.json'), json.dumps(record).encode())
+        return record
+    
+    def save_result(self, job_id, results):
+        self._write(self._path(job_id, '.pkl'), pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    def load_result(self, job_id):
+        """A finished job's results, or None if they were never saved or have been pruned"""
+        try:
+            with open(self._path(job_id, '.pkl'), 'rb') as fh:
+                return pickle.load(fh)
+        except FileNotFoundError:
+            return None
+    
+    def request_cancel(self, job_id):
+        open(self._path(job_id, '.cancel'), 'wb').close()
+    
+    def cancel_requested(self, job_id):
+        return os.path.exists(self._path(job_id, '.cancel'))
+    
+    @staticmethod
+    def owner_alive(record):
+        """False once the server process that accepted a job has exited; its pool went with it"""
+        if record['host'] != socket.gethostname():
+            # Another machine sharing the folder: assume its processes are fine
+            return True
+        try:
+            os.kill(record['pid'], 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+    
+    def prune(self, keep_finished):
+        """Delete the oldest finished (or abandoned) jobs beyond keep_finished"""
+        finished = []
+        for entry in os.scandir(self.folder):
+            job_id, ext = os.path.splitext(entry.name)
+            if ext != '.json':
+                continue
+            record = self.read(job_id)
+            if record is None:
+                continue
+            if record['status'] in JOB_FINISHED:
+                finished.append((record['finished'], job_id))
+            elif not self.owner_alive(record):
+                finished.append((record['submitted'], job_id))
+        finished.sort()
+        for _, job_id in finished[:max(0, len(finished) - keep_finished)]:
+            for suffix in ('.json', '.pkl', '.cancel'):
                 try:
-                    results['intercept'] = float(results['intercept'])
-                except Exception:
-                    # if intercept is list (logistic), take first element
-                    if isinstance(results['intercept'], (list, tuple)) and len(results['intercept']) > 0:
-                        results['intercept'] = float(results['intercept'][0])
-                    else:
-                        results['intercept'] = 0.0
-        except Exception:
-            # In case anything goes wrong preparing display values, fallback to safe defaults
-            results.setdefault('coef_table', [])
-            results.setdefault('intercept', 0.0)
+                    os.remove(self._path(job_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+def _run_analysis_job(store, job_id, spec):
+    """Process-pool entry point: run one analysis, recording its stage and outcome in the job store"""
+    def report(stage):
+        if store.cancel_requested(job_id):
+            raise JobCancelled()
+        store.update(job_id, status='running', stage=stage)
+    try:
+        results = run_analysis(spec, report)
+    except JobCancelled:
+        store.update(job_id, status='cancelled')
+        return
+    except Exception as e:
+        store.update(job_id, status='failed', error=str(e))
+        return
+    # Results first, so a job reported done always has them
+    store.save_result(job_id, results)
+    store.update(job_id, status='done')
+
+class JobManager:
+    """Runs analyses on a bounded process pool, tracking them in a JobStore
+
+    Each server process has its own pool and queue limit, but status,
+    results and cancellation all go through the store, so any process can
+    answer for a job that another one accepted.
+    """
+    
+    def __init__(self, store, max_workers, max_queue, keep_finished=200):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.keep_finished = keep_finished
+        self._executor = None
+        # Futures of this process's unfinished jobs
+        self._futures = {}
+        self._lock = threading.Lock()
+    
+    def _start(self):
+        # Started lazily so importing the app (or forking workers) does not spawn processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=process_context())
+    
+    def submit(self, spec):
+        """Queue an analysis and return its job id"""
+        with self._lock:
+            if len(self._futures) >= self.max_queue:
+                raise JobQueueFull(f'Too many analysis jobs in progress (limit {self.max_queue})')
+            self._start()
+            job_id = uuid.uuid4().hex
+            self.store.create(job_id, spec['regression_type'])
+            future = self._executor.submit(_run_analysis_job, self.store, job_id, spec)
+            self._futures[job_id] = future
+        # Outside the lock: a future that is already done runs the callback right here
+        future.add_done_callback(functools.partial(self._finished, job_id))
+        self.store.prune(self.keep_finished)
+        return job_id
+    
+    def _finished(self, job_id, future):
+        with self._lock:
+            self._futures.pop(job_id, None)
+        # The worker records its own outcome; this covers jobs that never ran or whose worker died
+        record = self.store.read(job_id)
+        if record is None or record['status'] in JOB_FINISHED:
+            return
+        if future.cancelled():
+            self.store.update(job_id, status='cancelled')
+        else:
+            self.store.update(job_id, status='failed', error=str(future.exception() or 'Job ended without a result'))
+    
+    def status(self, job_id):
+        """Return a JSON-serializable status dict, or None for unknown jobs"""
+        record = self.store.read(job_id)
+        if record is None:
+            return None
+        if record['status'] not in JOB_FINISHED:
+            if not self.store.owner_alive(record):
+                record = self.store.update(job_id, status='failed',
+                                           error='The server process running this job exited')
+                if record is None:
+                    return None
+            elif self.store.cancel_requested(job_id):
+                record['status'] = 'cancelling'
+        status = {
+            'job_id': job_id,
+            'status': record['status'],
+            'stage': record['stage'],
+            'elapsed_seconds': round(record.get('finished', time.time()) - record['submitted'], 2),
+            'regression_type': record['regression_type']
+        }
+        if record['status'] == 'failed':
+            status['error'] = record['error']
+        return status
+    
+    def result(self, job_id):
+        """A done job's results, or None"""
+        return self.store.load_result(job_id)
+    
+    def cancel(self, job_id):
+        """Cancel a queued job outright, or ask a running one to stop at its next stage"""
+        record = self.store.read(job_id)
+        if record is None or record['status'] in JOB_FINISHED:
+            return False
+        with self._lock:
+            future = self._futures.get(job_id)
+        # A future cancelled here records the job as cancelled through _finished
+        if future is None or not future.cancel():
+            self.store.request_cancel(job_id)
+        return True
+
+# Background analysis jobs
+job_manager = JobManager(JobStore(app.config['JOB_FOLDER']), app.config['JOB_WORKERS'],
+                         app.config['JOB_MAX_QUEUE'])
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    try:
+        # Get form data
+        regression_type = request.form.get('regression_type', 'linear')
+        app.logger.debug('analyze: regression_type=%s target=%s features=%s', regression_type,
+                         request.form.get('target_column'), request.form.getlist('feature_columns'))
         
-        return render_template('results.html', results=results)
+        try:
+            spec = analysis_spec_from_form(request.form)
+        except AnalysisRequestError as e:
+            return render_template('upload.html', error=str(e), regression_type=regression_type)
+        
+        results = run_analysis(spec)
+        with span('render_template'):
+            return render_template('results.html', results=results)
         
     except Exception as e:
-        import traceback
-        print(f"ERROR: {str(e)}")
-        print(traceback.format_exc())
+        app.logger.exception('Analysis failed')
         return render_template('upload.html', error=f'Analysis error: {str(e)}', regression_type=request.form.get('regression_type', 'linear'))
 
+def prediction_frame(req):
+    """Rows to score: JSON {"rows": [{...}]} or {"columns": {...}}, or a CSV body or file upload"""
+    if req.is_json:
+        payload = req.get_json(silent=True)
+        if isinstance(payload, dict) and isinstance(payload.get('rows'), list):
+            return pd.DataFrame.from_records(payload['rows'])
+        if isinstance(payload, dict) and isinstance(payload.get('columns'), dict):
+            return pd.DataFrame(payload['columns'])
+        raise ValueError('Expected a JSON object with a "rows" list or a "columns" object')
+    if 'file' in req.files:
+        return pd.read_csv(req.files['file'])
+    return pd.read_csv(io.BytesIO(req.get_data()))
+
+@app.route('/predict/<model_id>', methods=['GET', 'POST'])
+def predict(model_id):
+    """Score rows with a saved model; GET describes the inputs the model expects
+
+    CSV input gets CSV back (a prediction column, plus one probability column
+    per class for logistic models); JSON input gets JSON.
+    """
+    model = model_store.get(model_id)
+    if model is None:
+        return jsonify({'error': 'Unknown model'}), 404
+    if request.method == 'GET':
+        return jsonify({'model_id': model_id, 'feature_names': model.feature_names, 'link': model.link,
+                        'classes': model.classes.tolist() if model.classes is not None else None,
+                        'n_terms': len(model.terms) if model.terms is not None else None})
+    
+    try:
+        frame = prediction_frame(request)
+        missing_cols = [col for col in model.feature_names if col not in frame.columns]
+        if missing_cols:
+            raise ValueError(f'Columns not found in data: {missing_cols}')
+        predictions, proba = model.predict(frame[model.feature_names].to_numpy(dtype=np.float64))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not request.is_json:
+        out = pd.DataFrame({'prediction': predictions})
+        if proba is not None:
+            for j, cls in enumerate(model.classes):
+                out[f'probability_{cls}'] = proba[:, j]
+        return app.response_class(out.to_csv(index=False), mimetype='text/csv')
+    body = {'model_id': model_id, 'n_rows': len(predictions), 'predictions': predictions.tolist()}
+    if proba is not None:
+        body['classes'] = model.classes.tolist()
+        body['probabilities'] = proba.tolist()
+    return jsonify(body)
+
+def form_from_json(item, upload_fields=None):
+    """Turn one JSON model spec into the form fields analysis_spec_from_form reads"""
+    if not isinstance(item, dict):
+        raise AnalysisRequestError('Each spec must be a JSON object')
+    form = MultiDict()
+    for key, value in item.items():
+        for single in value if isinstance(value, list) else [value]:
+            if isinstance(single, bool):
+                single = 'on' if single else ''
+            if single is not None:
+                form.add(key, str(single))
+    # A spec that names its own upload keeps it; the request-level upload is only a default
+    if not any(form.get(key) for key in ('dataset', 'uploaded_filename')):
+        for key, value in (upload_fields or {}).items():
+            form[key] = value
+    return form
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze_batch():
+    """Run a JSON list of model specs against uploaded datasets
+
+    Body: {"specs": [{"regression_type": ..., "target_column": ..., "feature_columns": [...],
+    "degree": ...}, ...], "dataset" or "uploaded_filename": optional, "plots": false}. Specs take the same
+    fields as the /analyze form and may each name their own upload; the top-level one is the default.
+    Each entry in "results" has the metrics or an "error".
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('specs'), list) or not payload['specs']:
+        return jsonify({'error': 'Expected a JSON object with a non-empty "specs" list'}), 400
+    if len(payload['specs']) > app.config['BATCH_MAX_SPECS']:
+        return jsonify({'error': f"At most {app.config['BATCH_MAX_SPECS']} specs per request"}), 400
+    plots = payload.get('plots') is True
+    
+    upload_fields = {key: str(payload[key]) for key in ('dataset', 'uploaded_filename') if payload.get(key)}
+    entries = []
+    # saved path -> [(position in entries, spec)], so each upload is parsed and prepared once
+    groups = OrderedDict()
+    for item in payload['specs']:
+        try:
+            spec = analysis_spec_from_form(form_from_json(item, upload_fields))
+        except ValueError as e:
+            entries.append({'error': str(e)})
+            continue
+        groups.setdefault(spec['saved_path'], []).append((len(entries), spec))
+        entries.append(None)
+    
+    for saved_path, group in groups.items():
+        fitted = run_batch_analysis(saved_path, [spec for _, spec in group], plots=plots)
+        for (position, _), entry in zip(group, fitted):
+            entries[position] = entry
+    for entry in entries:
+        if entry.get('plot'):
+            entry['plot_url'] = url_for('plot_image', plot_id=entry['plot'])
+    return jsonify({'results': entries})
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue an analysis from the same form fields as /analyze"""
+    try:
+        spec = analysis_spec_from_form(request.form)
+        job_id = job_manager.submit(spec)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429
+    
+    status = job_manager.status(job_id)
+    status['status_url'] = url_for('job_status', job_id=job_id)
+    status['result_url'] = url_for('job_result', job_id=job_id)
+    return jsonify(status), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    status = job_manager.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Render the finished results page, or report the job's status if it is not done
+
+    A cancelled job never has results, so it gets 410 rather than 202.
+    """
+    status = job_manager.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if status['status'] == 'cancelled':
+        return jsonify(dict(status, error='Job was cancelled')), 410
+    if status['status'] == 'done':
+        results = job_manager.result(job_id)
+        if results is None:
+            return jsonify({'error': 'Job results are no longer available'}), 410
+        return render_template('results.html', results=results)
+    if status['status'] == 'failed':
+        return render_template('upload.html', error=f"Analysis error: {status['error']}",
+                               regression_type=status['regression_type'])
+    return jsonify(status), 202
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    if job_manager.status(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    cancelled = job_manager.cancel(job_id)
+    status = job_manager.status(job_id)
+    status['cancel_requested'] = cancelled
+    return jsonify(status), 200 if cancelled else 409
+
 if __name__ == '__main__':
+    # Development server; production runs gunicorn -c gunicorn.conf.py wsgi:app
+    warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
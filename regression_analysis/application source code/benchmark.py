@@ -0,0 +1,331 @@
+"""Offline benchmark for the regression pipeline
+
+Generates synthetic datasets over a grid of row counts, feature counts and
+polynomial degrees, times each stage of a fit separately (parse, prepare_data,
+split, scale, polynomial expansion, fit, plot, image encoding) and records
+each stage's peak memory. Results are written as JSON; with --baseline they
+are compared against an earlier run and the exit status is 1 on slowdowns.
+
+    python benchmark.py --rows 1e3 1e5 1e6 --features 5 20 --degrees 1 2 --output bench.json
+    python benchmark.py --output new.json --baseline bench.json --tolerance 0.25
+
+When both --backends run, the numpy/sklearn fit speedup per grid point is
+reported under "backend_speedups"; test_solver_backends.py checks they agree.
+
+Peak memory is measured in a separate tracemalloc pass so tracing does not
+inflate the timings; --no-memory skips it.
+
+--cold-start instead measures worker startup in fresh interpreters: importing
+the app and running a first analysis, against forking a warmed-up parent the
+way gunicorn's preload_app does (fork is POSIX only).
+
+    python benchmark.py --cold-start --repeat 5
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.preprocessing import StandardScaler
+
+import app as regression_app
+
+STAGES = ('parse', 'prepare', 'split', 'scale', 'expand', 'fit', 'plot', 'encode')
+
+class StageAnalyzer(regression_app.RegressionAnalyzer):
+    """RegressionAnalyzer that keeps its figures instead of writing them to the plot store"""
+
+    def save_plot(self, fig):
+        self.figure = fig
+        return None
+
+class StageTimer:
+    """Runs pipeline stages, recording each one's wall time and, optionally, peak memory"""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.seconds = {}
+        self.peak_bytes = {}
+
+    def run(self, stage, func, *args):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = func(*args)
+        self.seconds[stage] = time.perf_counter() - start
+        if self.trace_memory:
+            self.peak_bytes[stage] = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+        return result
+
+    def skip(self, stage):
+        """Record a stage this configuration does not run"""
+        self.seconds[stage] = 0.0
+        if self.trace_memory:
+            self.peak_bytes[stage] = 0
+
+def dataset_path(data_dir, n_rows, n_features, seed):
+    """Write (once) a synthetic CSV with a nonlinear target and a few missing values"""
+    path = os.path.join(data_dir, f'synthetic_{n_rows}x{n_features}_{seed}.csv')
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    weights = rng.normal(size=n_features)
+    y = X @ weights + 0.5 * X[:, 0] ** 2 + rng.normal(scale=0.5, size=n_rows)
+    df = pd.DataFrame(X, columns=[f'x{i}' for i in range(n_features)])
+    df['y'] = y
+    # Exercise mean imputation in prepare_data
+    df.loc[rng.random(n_rows) < 0.01, 'x0'] = np.nan
+    tmp_path = f'{path}.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+def run_pipeline(path, n_features, degree, backend, timer):
+    """One fit of the pipeline /analyze runs, stage by stage"""
+    analyzer = StageAnalyzer(backend=backend)
+    features = [f'x{i}' for i in range(n_features)]
+
+    df = timer.run('parse', lambda: regression_app.compact_frame(regression_app.read_dataset(path))[0])
+    X, y = timer.run('prepare', analyzer.prepare_data, df, 'y', features)
+    X_train, X_test, y_train, y_test = timer.run('split', analyzer.split_data, df, X, y, 42)
+    # Scaling is folded into fit_least_squares; this is the same standardization on its own
+    timer.run('scale', lambda: StandardScaler().fit(X_train).transform(X_test))
+
+    if degree == 1:
+        timer.skip('expand')
+        y_pred = timer.run('fit', analyzer.fit_least_squares, X_train, y_train, X_test)[2]
+        plot_method = analyzer.create_linear_plot
+    else:
+        plan = regression_app.plan_polynomial_expansion(len(X), n_features, degree)
+        terms = regression_app.polynomial_terms(n_features, degree, plan['interaction_only'], plan['max_terms'])
+        if plan['mode'] == 'dense':
+            X_train_poly, X_test_poly = timer.run('expand', lambda: (regression_app.expand_polynomial(X_train, terms),
+                                                                      regression_app.expand_polynomial(X_test, terms)))
+            y_pred = timer.run('fit', analyzer.fit_least_squares, X_train_poly, y_train, X_test_poly)[2]
+        else:
+            # Blockwise mode expands inside the fit, one row block at a time
+            timer.skip('expand')
+            y_pred = timer.run('fit', analyzer.fit_blockwise_ridge, X_train, y_train, X_test, terms)[2]
+        plot_method = analyzer.create_polynomial_plot
+
+    timer.run('plot', plot_method, X_test, y_test, y_pred, features)
+    fmt = regression_app.app.config['PLOT_FORMAT']
+    timer.run('encode', lambda: analyzer.figure.savefig(io.BytesIO(), format=fmt, dpi=100, bbox_inches='tight'))
+
+def benchmark_case(path, n_rows, n_features, degree, backend, repeat, trace_memory):
+    """Best-of-repeat stage timings for one grid point, plus peak memory from a traced run"""
+    runs = []
+    for _ in range(repeat):
+        timer = StageTimer()
+        run_pipeline(path, n_features, degree, backend, timer)
+        runs.append(timer.seconds)
+    stages = {stage: {'seconds': round(min(run[stage] for run in runs), 6)} for stage in STAGES}
+
+    if trace_memory:
+        timer = StageTimer(trace_memory=True)
+        tracemalloc.start()
+        try:
+            run_pipeline(path, n_features, degree, backend, timer)
+        finally:
+            tracemalloc.stop()
+        for stage in STAGES:
+            stages[stage]['peak_bytes'] = int(timer.peak_bytes.get(stage, 0))
+
+    return {
+        'rows': n_rows,
+        'features': n_features,
+        'degree': degree,
+        'backend': backend,
+        'file_bytes': os.path.getsize(path),
+        'stages': stages,
+        'total_seconds': round(sum(stage['seconds'] for stage in stages.values()), 6)
+    }
+
+# Run in a fresh interpreter: time the app import, then the first analysis,
+# either directly (a cold worker) or in a child forked after warm_up()
+COLD_START_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+import app
+import benchmark
+imported = time.perf_counter()
+mode, path = sys.argv[1], sys.argv[2]
+result = {'import_seconds': imported - start}
+if mode == 'cold':
+    benchmark.run_pipeline(path, 5, 1, 'numpy', benchmark.StageTimer())
+    result['first_analysis_seconds'] = time.perf_counter() - imported
+else:
+    app.warm_up()
+    result['warm_up_seconds'] = time.perf_counter() - imported
+    read_fd, write_fd = os.pipe()
+    forked = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        benchmark.run_pipeline(path, 5, 1, 'numpy', benchmark.StageTimer())
+        os.write(write_fd, repr(time.perf_counter() - forked).encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+    result['first_analysis_seconds'] = float(os.read(read_fd, 64))
+print(json.dumps(result))
+"""
+
+def measure_cold_start(path, repeat):
+    """Median startup timings of a cold worker and of a worker forked from a warmed-up parent"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    modes = {}
+    for mode in ('cold', 'preloaded'):
+        runs = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT, mode, path], cwd=here,
+                                    check=True, capture_output=True, text=True).stdout
+            runs.append(json.loads(output.splitlines()[-1]))
+        modes[mode] = {key: round(float(np.median([run[key] for run in runs])), 4) for key in runs[0]}
+    # What a newly started worker spends before its first response is done
+    modes['cold']['worker_start_seconds'] = round(modes['cold']['import_seconds']
+                                                  + modes['cold']['first_analysis_seconds'], 4)
+    modes['preloaded']['worker_start_seconds'] = modes['preloaded']['first_analysis_seconds']
+    return modes
+
+def case_key(case):
+    return f"rows={case['rows']} features={case['features']} degree={case['degree']} backend={case['backend']}"
+
+def backend_speedups(cases):
+    """Fit-time ratio sklearn/numpy for each grid point that ran with both backends"""
+    fits = {}
+    for case in cases:
+        point = (case['rows'], case['features'], case['degree'])
+        fits.setdefault(point, {})[case['backend']] = case['stages']['fit']['seconds']
+    return [{'rows': rows, 'features': features, 'degree': degree, 'numpy_fit_seconds': fit['numpy'],
+             'sklearn_fit_seconds': fit['sklearn'],
+             'speedup': round(fit['sklearn'] / fit['numpy'], 2) if fit['numpy'] else None}
+            for (rows, features, degree), fit in fits.items() if 'numpy' in fit and 'sklearn' in fit]
+
+def compare_to_baseline(results, baseline, tolerance, min_seconds):
+    """Stage timings that are more than tolerance slower than the baseline's
+
+    Differences below min_seconds are treated as noise.
+    """
+    previous = {case_key(case): case for case in baseline['cases']}
+    regressions = []
+    for case in results['cases']:
+        old = previous.get(case_key(case))
+        if old is None:
+            continue
+        for stage, timing in case['stages'].items():
+            old_seconds = old['stages'].get(stage, {}).get('seconds')
+            if old_seconds is None:
+                continue
+            new_seconds = timing['seconds']
+            if new_seconds - old_seconds > min_seconds and new_seconds > old_seconds * (1 + tolerance):
+                regressions.append({'case': case_key(case), 'stage': stage, 'baseline_seconds': old_seconds,
+                                    'seconds': new_seconds, 'ratio': round(new_seconds / old_seconds, 3)
+                                    if old_seconds else None})
+    return regressions
+
+def parse_count(value):
+    """Row/feature counts may be written as 1e6"""
+    return int(float(value))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', nargs='+', type=parse_count, default=[1000, 10000, 100000, 1000000],
+                        help='row counts to generate (1e7 works, given the memory)')
+    parser.add_argument('--features', nargs='+', type=parse_count, default=[5, 20])
+    parser.add_argument('--degrees', nargs='+', type=int, default=[1, 2, 3])
+    parser.add_argument('--backends', nargs='+', choices=['numpy', 'sklearn'], default=['numpy', 'sklearn'])
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', help='where generated CSVs are kept between runs (default: a temp dir)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown per stage (0.25 = 25%%)')
+    parser.add_argument('--min-seconds', type=float, default=0.005, help='ignore differences smaller than this')
+    parser.add_argument('--cold-start', action='store_true',
+                        help='measure worker startup (import, warm-up, first analysis) instead of the grid')
+    args = parser.parse_args(argv)
+
+    temp_dir = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        temp_dir = tempfile.TemporaryDirectory(prefix='regression-bench-')
+        data_dir = temp_dir.name
+    os.makedirs(data_dir, exist_ok=True)
+
+    cases = []
+    cold_start = None
+    try:
+        if args.cold_start:
+            cold_start = measure_cold_start(dataset_path(data_dir, 1000, 5, args.seed), args.repeat)
+            for mode, timings in cold_start.items():
+                print(f"{mode}: worker start {timings['worker_start_seconds']:.3f}s", file=sys.stderr)
+        for n_rows in ([] if args.cold_start else args.rows):
+            for n_features in args.features:
+                path = dataset_path(data_dir, n_rows, n_features, args.seed)
+                for degree in args.degrees:
+                    for backend in args.backends:
+                        case = benchmark_case(path, n_rows, n_features, degree, backend, args.repeat,
+                                              not args.no_memory)
+                        cases.append(case)
+                        print(f"{case_key(case)}: {case['total_seconds']:.3f}s "
+                              f"(fit {case['stages']['fit']['seconds']:.3f}s)", file=sys.stderr)
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    results = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'cases': cases
+    }
+    if cold_start is not None:
+        results['cold_start'] = cold_start
+    speedups = backend_speedups(cases)
+    if speedups:
+        results['backend_speedups'] = speedups
+        for entry in speedups:
+            print(f"rows={entry['rows']} features={entry['features']} degree={entry['degree']}: numpy fit "
+                  f"{entry['speedup']}x faster than sklearn", file=sys.stderr)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        regressions = compare_to_baseline(results, baseline, args.tolerance, args.min_seconds)
+        results['regressions'] = regressions
+        for regression in regressions:
+            print(f"SLOWER {regression['case']} {regression['stage']}: {regression['baseline_seconds']:.4f}s -> "
+                  f"{regression['seconds']:.4f}s", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(payload + '\n')
+    else:
+        print(payload)
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
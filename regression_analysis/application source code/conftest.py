@@ -0,0 +1,41 @@
+"""Shared pytest setup: a throwaway upload folder and a test client for the app"""
+import io
+import os
+import re
+import tempfile
+
+import pytest
+
+# Set before app is imported so uploads, caches, plots and models stay out of the source tree
+_upload_root = tempfile.TemporaryDirectory(prefix='regression-tests-')
+os.environ.setdefault('UPLOAD_FOLDER', _upload_root.name)
+
+import app as regression_app
+
+# The templates sit next to app.py rather than in templates/
+regression_app.app.template_folder = os.path.dirname(os.path.abspath(regression_app.__file__))
+
+@pytest.fixture
+def client():
+    regression_app.app.config['TESTING'] = True
+    return regression_app.app.test_client()
+
+@pytest.fixture
+def upload(client):
+    """Upload a DataFrame as CSV and return its dataset id"""
+    def upload_frame(df, name='data.csv', regression_type='linear'):
+        response = client.post('/upload', data={'regression_type': regression_type,
+                                                'file': (io.BytesIO(df.to_csv(index=False).encode()), name)},
+                               content_type='multipart/form-data')
+        assert response.status_code == 200
+        return re.search(rb'name="dataset" value="([^"]+)"', response.data).group(1).decode()
+    return upload_frame
+
+@pytest.fixture
+def poly_budget(monkeypatch):
+    """Set the polynomial memory budget and over-budget policy for one test"""
+    monkeypatch.setitem(regression_app.app.config, 'CV_WORKERS', 1)
+    def set_budget(n_bytes, policy='downgrade'):
+        monkeypatch.setitem(regression_app.app.config, 'POLY_MEMORY_BUDGET_BYTES', n_bytes)
+        monkeypatch.setitem(regression_app.app.config, 'POLY_OVER_BUDGET', policy)
+    return set_budget
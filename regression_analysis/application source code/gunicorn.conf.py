@@ -0,0 +1,34 @@
+"""Gunicorn settings for the regression analysis app
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is imported and warmed up in the master process (preload_app), so
+every worker is forked with pandas, scikit-learn, matplotlib and the warmed
+analyzer already in memory, shared copy-on-write. Starting a worker then
+costs a fork rather than an import.
+
+Uploads, plots, saved models and background job status and results are
+files under UPLOAD_FOLDER, so any worker can answer any request. Each
+worker runs its own job pool (JOB_WORKERS processes, JOB_MAX_QUEUE jobs),
+and /metrics reports the histograms of whichever worker served the scrape.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count()))
+# Threads let a worker keep serving previews and job status polls during a long fit
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+preload_app = True
+# Large fits can take minutes
+timeout = int(os.environ.get('WEB_TIMEOUT', 300))
+graceful_timeout = 30
+# Off unless asked for: a recycled worker takes the jobs still queued in its pool with it
+# (they are then reported as failed)
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = 100 if max_requests else 0
+accesslog = '-'
+
+def post_fork(server, worker):
+    server.log.info('Worker %s forked from a warmed-up master', worker.pid)
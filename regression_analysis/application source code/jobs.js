@@ -0,0 +1,41 @@
+// Background analysis jobs, shared by the upload and results pages
+
+// Submit a form to the /jobs endpoint at url and follow the job it starts
+function runBackgroundJob(url, form, statusLine, label) {
+    fetch(url, { method: 'POST', body: new FormData(form) })
+        .then(response => response.json())
+        .then(job => {
+            if (job.error) {
+                statusLine.textContent = job.error;
+                return;
+            }
+            pollJob(job, statusLine, label);
+        })
+        .catch(() => {
+            statusLine.textContent = `${label}: could not submit the job`;
+        });
+}
+
+// Poll once a second while the job is queued or running, then open its result page.
+// Polling stops on a cancelled job, an unexpected status, or a failed status request.
+function pollJob(job, statusLine, label) {
+    const check = () => fetch(job.status_url)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`status request failed (${response.status})`);
+            }
+            return response.json();
+        })
+        .then(status => {
+            statusLine.textContent = `${label}: ${status.status} (${status.stage}, ${status.elapsed_seconds}s)`;
+            if (['done', 'failed'].includes(status.status)) {
+                window.location = job.result_url;
+            } else if (['queued', 'running', 'cancelling'].includes(status.status)) {
+                setTimeout(check, 1000);
+            }
+        })
+        .catch(error => {
+            statusLine.textContent = `${label}: ${error.message}`;
+        });
+    setTimeout(check, 1000);
+}
@@ -0,0 +1,47 @@
+"""The JSON batch endpoint, /api/analyze"""
+import numpy as np
+import pandas as pd
+import pytest
+
+def make_frame(sign, seed=0, n_rows=400):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_rows, 2)), columns=['a', 'b'])
+    df['y'] = sign * 2 * df['a'] + rng.normal(scale=0.1, size=n_rows)
+    return df
+
+SPEC = {'regression_type': 'linear', 'target_column': 'y', 'feature_columns': ['a', 'b']}
+
+def batch(client, specs, **payload):
+    response = client.post('/api/analyze', json=dict(payload, specs=specs))
+    assert response.status_code == 200
+    return response.get_json()['results']
+
+def test_specs_fit_the_upload_they_name(client, upload):
+    first, second = upload(make_frame(1), 'first.csv'), upload(make_frame(-1, seed=1), 'second.csv')
+    alone = {dataset: batch(client, [dict(SPEC, dataset=dataset)])[0]['coefficients']
+             for dataset in (first, second)}
+    assert alone[first][0] > 0 > alone[second][0]
+
+    results = batch(client, [dict(SPEC), dict(SPEC, dataset=second), dict(SPEC, dataset=first),
+                             dict(SPEC, uploaded_filename='second.csv')], dataset=first)
+    # Specs without an upload of their own use the request-level one
+    assert [entry['coefficients'] for entry in results] == [alone[first], alone[second], alone[first],
+                                                           alone[second]]
+
+def test_invalid_specs_keep_their_position(client, upload):
+    dataset = upload(make_frame(1))
+    results = batch(client, ['junk', dict(SPEC), dict(SPEC, target_column='missing'),
+                             dict(SPEC, degree='abc')], dataset=dataset)
+    assert results[0]['error'] == 'Each spec must be a JSON object'
+    assert 'coefficients' in results[1]
+    assert 'Columns not found' in results[2]['error']
+    assert 'degree must be a whole number' in results[3]['error']
+
+@pytest.mark.parametrize('payload', [{}, {'specs': []}, {'specs': 'x'}])
+def test_malformed_requests_are_rejected(client, payload):
+    assert client.post('/api/analyze', json=payload).status_code == 400
+
+@pytest.mark.parametrize('field', ['cv_folds', 'sample_rows', 'random_state'])
+def test_whole_number_fields_are_checked(client, upload, field):
+    result, = batch(client, [dict(SPEC, **{field: '2.5'})], dataset=upload(make_frame(1)))
+    assert result['error'] == f"{field} must be a whole number, got '2.5'"
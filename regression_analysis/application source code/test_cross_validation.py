@@ -0,0 +1,60 @@
+"""Polynomial cross-validation and degree sweeps follow the same expansion plan as a single fit
+
+    python -m pytest test_cross_validation.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as regression_app
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.normal(size=(300, 3)), columns=['a', 'b', 'c'])
+    df['y'] = 2 * df['a'] - df['b'] * df['c'] + rng.normal(scale=0.1, size=len(df))
+    return df
+
+def cross_validate(df, **kwargs):
+    analyzer = regression_app.RegressionAnalyzer(render_plots=False)
+    return analyzer.perform_cross_validation(df, 'y', ['a', 'b', 'c'], 'polynomial', n_folds=3, **kwargs)
+
+def test_over_budget_expansion_is_rejected(frame, poly_budget):
+    poly_budget(1000, policy='reject')
+    with pytest.raises(ValueError, match='budget'):
+        cross_validate(frame)
+
+def test_blockwise_folds_match_dense_folds(frame, poly_budget):
+    dense = cross_validate(frame)
+    poly_budget(10000)
+    blockwise = cross_validate(frame)
+    assert (dense['expansion']['mode'], blockwise['expansion']['mode']) == ('dense', 'blockwise')
+    assert blockwise['r2_score'] == pytest.approx(dense['r2_score'], abs=1e-3)
+
+def test_max_terms_caps_every_fold(frame):
+    results = cross_validate(frame, max_terms=3)
+    assert results['expansion']['n_terms'] == 3
+    # a, b and c alone cannot fit the b*c interaction
+    assert results['r2_score'] < cross_validate(frame)['r2_score']
+
+def sweep(df, **kwargs):
+    analyzer = regression_app.RegressionAnalyzer(render_plots=False)
+    return analyzer.perform_polynomial_sweep(df, 'y', ['a', 'b', 'c'], max_degree=3, **kwargs)
+
+def test_over_budget_sweep_follows_the_policy(frame, poly_budget):
+    poly_budget(60000)
+    results = sweep(frame)
+    assert [row['degree'] for row in results['sweep']] == [1, 2]
+    assert 'Sweep stopped at degree 2' in results['expansion']['notes'][0]
+    poly_budget(60000, policy='reject')
+    with pytest.raises(ValueError, match='degree 2 is the most'):
+        sweep(frame)
+
+def test_max_terms_caps_the_sweep(frame):
+    results = sweep(frame, max_terms=5)
+    assert [row['n_terms'] for row in results['sweep']] == [3, 5]
+    assert len(results['model'].terms) == results['expansion']['n_terms'] <= 5
+    # The capped degree matches a single fit with the same cap
+    single = regression_app.RegressionAnalyzer(render_plots=False).perform_polynomial_regression(
+        frame, 'y', ['a', 'b', 'c'], degree=3, max_terms=5)
+    assert results['sweep'][1]['test_r2'] == pytest.approx(single['r2_score'], abs=1e-4)
@@ -0,0 +1,104 @@
+"""Background analysis jobs, /jobs, answered from any server process"""
+import io
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import app as regression_app
+
+def make_frame(n_rows=400):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(n_rows, 2)), columns=['a', 'b'])
+    df['y'] = 2 * df['a'] + rng.normal(scale=0.1, size=n_rows)
+    return df
+
+@pytest.fixture
+def job_form(upload):
+    return {'regression_type': 'linear', 'dataset': upload(make_frame()), 'target_column': 'y',
+            'feature_columns': ['a', 'b']}
+
+def wait_for(client, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f'/jobs/{job_id}').get_json()
+        if status['status'] in regression_app.JOB_FINISHED:
+            return status
+        time.sleep(0.1)
+    raise AssertionError(f'job {job_id} still {status["status"]} after {timeout}s')
+
+def other_process():
+    """A JobManager standing in for another gunicorn worker: same store, no shared memory"""
+    return regression_app.JobManager(regression_app.JobStore(regression_app.app.config['JOB_FOLDER']), 1, 1)
+
+def test_job_runs_to_results(client, job_form):
+    response = client.post('/jobs', data=job_form)
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert wait_for(client, job_id)['status'] == 'done'
+    assert client.get(f'/jobs/{job_id}/result').status_code == 200
+
+def test_other_process_sees_status_and_results(client, job_form):
+    job_id = client.post('/jobs', data=job_form).get_json()['job_id']
+    wait_for(client, job_id)
+    other = other_process()
+    assert other.status(job_id)['status'] == 'done'
+    assert other.result(job_id)['r2_score'] > 0.9
+
+def test_other_process_can_cancel(client, job_form):
+    store = regression_app.job_manager.store
+    job_id = '0' * 32
+    store.create(job_id, 'linear')
+    assert other_process().cancel(job_id)
+    assert client.get(f'/jobs/{job_id}').get_json()['status'] == 'cancelling'
+    # The worker running the job stops at its next stage
+    spec = regression_app.analysis_spec_from_form(MultiDict(job_form))
+    regression_app._run_analysis_job(store, job_id, spec)
+    assert client.get(f'/jobs/{job_id}').get_json()['status'] == 'cancelled'
+    assert client.get(f'/jobs/{job_id}/result').status_code == 410
+    assert client.post(f'/jobs/{job_id}/cancel').status_code == 409
+
+def test_queued_job_is_cancelled_in_place(client, job_form, monkeypatch):
+    manager = other_process()
+    # A one-thread pool kept busy, so the submitted job stays queued
+    manager._executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    manager._executor.submit(release.wait)
+    monkeypatch.setattr(regression_app, 'job_manager', manager)
+    try:
+        job_id = client.post('/jobs', data=job_form).get_json()['job_id']
+        assert client.post(f'/jobs/{job_id}/cancel').get_json()['status'] == 'cancelled'
+        assert client.get(f'/jobs/{job_id}/result').status_code == 410
+        assert not manager._futures
+    finally:
+        release.set()
+        manager._executor.shutdown()
+
+def test_jobs_of_an_exited_process_fail(client):
+    store = regression_app.job_manager.store
+    job_id = '1' * 32
+    store.create(job_id, 'linear')
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    store.update(job_id, pid=exited.pid)
+    status = client.get(f'/jobs/{job_id}').get_json()
+    assert status['status'] == 'failed'
+    assert 'exited' in status['error']
+
+def test_unknown_jobs(client):
+    for path in ('/jobs/{}', '/jobs/{}/result'):
+        assert client.get(path.format('f' * 32)).status_code == 404
+        assert client.get(path.format('../../etc')).status_code == 404
+    assert client.post('/jobs/{}/cancel'.format('f' * 32)).status_code == 404
+
+def test_pages_share_the_job_script(client):
+    csv = io.BytesIO(make_frame().to_csv(index=False).encode())
+    page = client.post('/upload', data={'regression_type': 'linear', 'file': (csv, 'data.csv')},
+                       content_type='multipart/form-data').data.decode()
+    assert 'jobs.js' in page and 'data-jobs-url="/jobs"' in page
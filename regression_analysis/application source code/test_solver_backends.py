@@ -0,0 +1,107 @@
+"""Parity of the NumPy least-squares backend with the scikit-learn reference
+
+    python -m pytest test_solver_backends.py
+
+The speed comparison between the two backends is in benchmark.py:
+
+    python benchmark.py --rows 1e4 1e5 1e6 --features 5 20 --degrees 1 2 --no-memory
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as regression_app
+
+RTOL = 1e-8
+ATOL = 1e-8
+
+def fit_both(X_train, y_train, X_test):
+    """fit_least_squares results from each backend, numpy first"""
+    return [regression_app.RegressionAnalyzer(backend=backend).fit_least_squares(X_train, y_train, X_test)
+            for backend in ('numpy', 'sklearn')]
+
+def assert_same_fit(X_train, y_train, X_test):
+    (coef, intercept, y_pred), (ref_coef, ref_intercept, ref_pred) = fit_both(X_train, y_train, X_test)
+    np.testing.assert_allclose(coef, ref_coef, rtol=RTOL, atol=ATOL)
+    assert intercept == pytest.approx(ref_intercept, rel=RTOL, abs=ATOL)
+    np.testing.assert_allclose(y_pred, ref_pred, rtol=RTOL, atol=ATOL)
+
+def make_design(n_rows=500, n_features=4, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features)) * rng.uniform(0.1, 100, size=n_features)
+    y = X @ rng.normal(size=n_features) + 0.3 * X[:, 0] ** 2 + rng.normal(size=n_rows)
+    return X[:400], y[:400], X[400:]
+
+def test_linear_design():
+    assert_same_fit(*make_design())
+
+@pytest.mark.parametrize('degree', [2, 3])
+@pytest.mark.parametrize('interaction_only', [False, True])
+def test_dense_polynomial_design(degree, interaction_only):
+    X_train, y_train, X_test = make_design(n_features=3)
+    terms = regression_app.polynomial_terms(X_train.shape[1], degree, interaction_only)
+    assert_same_fit(regression_app.expand_polynomial(X_train, terms), y_train,
+                    regression_app.expand_polynomial(X_test, terms))
+
+def test_rank_deficient_design():
+    X_train, y_train, X_test = make_design()
+    # Duplicated columns leave the Gram matrix singular. scikit-learn's lstsq turns rounding noise
+    # into huge offsetting weights there, so the reference is its fit without the copies: the
+    # minimum-norm solution predicts the same and splits each weight evenly across the copies.
+    extend = lambda X: np.column_stack([X, X[:, 0], X[:, 2], X[:, 0]])
+    coef, intercept, y_pred = regression_app.RegressionAnalyzer(backend='numpy').fit_least_squares(
+        extend(X_train), y_train, extend(X_test))
+    ref_coef, ref_intercept, ref_pred = regression_app.RegressionAnalyzer(backend='sklearn').fit_least_squares(
+        X_train, y_train, X_test)
+    expected = ref_coef.copy()
+    expected[0] /= 3
+    expected[2] /= 2
+    np.testing.assert_allclose(coef, np.concatenate([expected, expected[[0, 2, 0]]]), rtol=RTOL, atol=ATOL)
+    assert intercept == pytest.approx(ref_intercept, rel=RTOL, abs=ATOL)
+    np.testing.assert_allclose(y_pred, ref_pred, rtol=RTOL, atol=ATOL)
+
+def test_constant_column():
+    X_train, y_train, X_test = make_design()
+    extend = lambda X: np.column_stack([X, np.full(len(X), 7.5)])
+    (coef, _, _), _ = fit_both(extend(X_train), y_train, extend(X_test))
+    assert coef[-1] == 0.0
+    assert_same_fit(extend(X_train), y_train, extend(X_test))
+
+def test_only_constant_columns():
+    X_train, y_train, X_test = make_design()
+    assert_same_fit(np.ones((len(X_train), 2)), y_train, np.ones((len(X_test), 2)))
+
+@pytest.mark.parametrize('regression_type', ['linear', 'polynomial'])
+def test_analysis_results_match(regression_type):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(300, 3)), columns=['a', 'b', 'c'])
+    df['y'] = 2 * df['a'] - df['b'] * df['c'] + rng.normal(scale=0.1, size=len(df))
+    df.loc[::13, 'b'] = np.nan
+
+    def run(backend):
+        analyzer = regression_app.RegressionAnalyzer(backend=backend, render_plots=False)
+        if regression_type == 'linear':
+            return analyzer.perform_linear_regression(df, 'y', ['a', 'b', 'c'])
+        return analyzer.perform_polynomial_regression(df, 'y', ['a', 'b', 'c'], degree=2)
+
+    results, reference = run('numpy'), run('sklearn')
+    for key in ('r2_score', 'mse', 'rmse'):
+        assert results[key] == reference[key]
+    # The saved models score new rows identically
+    np.testing.assert_allclose(results['model'].weights, reference['model'].weights, rtol=RTOL, atol=ATOL)
+    assert results['model'].bias == pytest.approx(reference['model'].bias, rel=RTOL, abs=ATOL)
+
+@pytest.mark.parametrize('regression_type', ['linear', 'polynomial', 'logistic'])
+@pytest.mark.parametrize('prepared', [False, True])
+def test_models_fill_missing_values_like_training(regression_type, prepared):
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.normal(size=(300, 3)), columns=['a', 'b', 'c'])
+    df['y'] = df['a'] > 0 if regression_type == 'logistic' else 2 * df['a'] + rng.normal(size=len(df))
+    df.loc[::7, 'b'] = np.nan
+    source = regression_app.PreparedDataset(df) if prepared else df
+    analyzer = regression_app.RegressionAnalyzer(render_plots=False)
+    fit = {'linear': analyzer.perform_linear_regression,
+           'polynomial': analyzer.perform_polynomial_regression,
+           'logistic': analyzer.perform_logistic_regression}[regression_type]
+    # Training filled the gaps with the full column means, not the train split's
+    np.testing.assert_allclose(fit(source, 'y', ['a', 'b', 'c'])['model'].fill, df[['a', 'b', 'c']].mean())
@@ -0,0 +1,40 @@
+"""Files derived from uploads stay within their bounds"""
+import os
+import pickle
+
+import numpy as np
+
+import app as regression_app
+
+def make_model(seed):
+    rng = np.random.default_rng(seed)
+    return regression_app.FittedModel(['a', 'b'], rng.normal(size=2), rng.normal(size=2), rng.normal())
+
+def test_trimmed_results_take_their_plots(tmp_path):
+    plots = [regression_app.store_plot(f'plot {i}'.encode(), 'svg') for i in range(2)]
+    entry_size = len(pickle.dumps({'plot': plots[0]}, protocol=pickle.HIGHEST_PROTOCOL))
+    cache = regression_app.ResultCache(0, str(tmp_path), disk_max_bytes=entry_size)
+    for i, plot_id in enumerate(plots):
+        spec = {'regression_type': 'linear', 'target_column': 'y', 'feature_columns': ['a'], 'degree': 2,
+                'interaction_only': False, 'max_terms': None, 'sweep': False, 'random_state': i,
+                'streaming': False, 'cv_folds': 0, 'stepwise': None, 'sample_rows': 0}
+        key = regression_app.ResultCache.make_key('0' * 64, spec)
+        cache.put(key, {'plot': plot_id})
+        os.utime(cache._disk_path(key), ns=(i + 1, i + 1))
+    plot_folder = regression_app.app.config['PLOT_FOLDER']
+    # Only the newest entry fits on disk; the older one left with its plot
+    assert not os.path.exists(os.path.join(plot_folder, plots[0]))
+    assert cache.get(key) == {'plot': plots[1]}
+
+def test_model_store_evicts_least_recently_used(tmp_path):
+    models = [make_model(seed) for seed in range(3)]
+    size = len(models[0].to_bytes())
+    store = regression_app.ModelStore(str(tmp_path), max_entries=0, max_bytes=2 * size)
+    first, second = store.save(models[0]), store.save(models[1])
+    os.utime(tmp_path / f'{first}.npz', ns=(1, 1))
+    os.utime(tmp_path / f'{second}.npz', ns=(2, 2))
+    assert store.get(first) is not None
+    third = store.save(models[2])
+    # The model just used survives; the one left idle makes room
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
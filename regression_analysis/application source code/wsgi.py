@@ -0,0 +1,10 @@
+"""WSGI entry point for production servers
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module loads pandas, scikit-learn and matplotlib and warms up
+the analyzer; with preload_app this happens once, before workers fork.
+"""
+from app import app, warm_up
+
+warm_up()